@@ -1,38 +1,180 @@
 """Langchain agent core for Chat-Bot-Prototype."""
 
 import asyncio
+import functools
+import hashlib
 import logging
-from typing import Any, Optional
-
+import socket
+import threading
+import uuid
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, AsyncIterator, Iterator, Optional
+from urllib.parse import urlparse
+
+import httpx
 from langchain.agents import AgentState, create_agent
 from langchain.agents.middleware import before_model
-from langchain.messages import RemoveMessage
+from langchain.messages import AIMessage, HumanMessage, RemoveMessage
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from langgraph.checkpoint.memory import InMemorySaver
-from langgraph.graph.message import REMOVE_ALL_MESSAGES
 from langgraph.runtime import Runtime
+from mcp.shared.exceptions import McpError
 
-from chat_bot.config.settings import Settings
-from chat_bot.providers.base import BaseProvider
+from chat_bot.config.settings import Settings, get_settings
+from chat_bot.providers._cache import enable_llm_cache
+from chat_bot.providers.base import BaseProvider, content_text
 from chat_bot.providers.gemini import GeminiProvider
 from chat_bot.providers.ollama import OllamaProvider
 
 logger = logging.getLogger(__name__)
 
+# Approximate number of characters per token used for context budgeting
+CHARS_PER_TOKEN = 3
+
+# Tool outputs longer than this many characters are truncated in the middle
+TOOL_OUTPUT_CHAR_LIMIT = 4000
+
+# Text replacing the middle of a truncated tool output
+TRUNCATION_MARKER = "...[truncated]..."
+
+# Seconds to wait for a TCP connection to the MCP server before giving up
+MCP_PREFLIGHT_TIMEOUT = 0.2
+
+# Provider classes by name; add an entry here to support a new provider
+PROVIDERS: dict[str, type[BaseProvider]] = {
+    "ollama": OllamaProvider,
+    "gemini": GeminiProvider,
+}
+
+
+def _mcp_server_reachable(url: str, timeout: float = MCP_PREFLIGHT_TIMEOUT) -> bool:
+    """Check whether the MCP server accepts TCP connections.
+
+    Parameters
+    ----------
+    url : str
+        URL of the MCP server.
+    timeout : float, optional
+        Seconds to wait for the connection. Default is MCP_PREFLIGHT_TIMEOUT.
+
+    Returns
+    -------
+    bool
+        False if the server refused or did not answer the connection, True
+        otherwise. URLs without a host are reported as reachable so that the
+        MCP client can reject them with its own error.
+
+    """
+    parsed = urlparse(url)
+    if not parsed.hostname:
+        return True
+    try:
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    except ValueError:
+        return True
+
+    try:
+        with socket.create_connection((parsed.hostname, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def _message_chars(message) -> int:
+    """Get the character length of a message's content and tool calls.
+
+    Parameters
+    ----------
+    message : BaseMessage
+        Message to measure.
+
+    Returns
+    -------
+    int
+        Number of characters in the message text plus the names and
+        argument values of any tool calls.
 
-def create_trim_messages_middleware(memory_limit: int):
+    """
+    chars = len(content_text(message.content))
+    for call in getattr(message, "tool_calls", None) or ():
+        chars += len(call["name"]) + sum(len(str(value)) for value in call["args"].values())
+    return chars
+
+
+def _truncate_tool_output(message, limit: int):
+    """Truncate an oversized tool message, keeping its head and tail.
+
+    Parameters
+    ----------
+    message : BaseMessage
+        Message to truncate.
+    limit : int
+        Maximum number of characters in the result, including the
+        truncation marker.
+
+    Returns
+    -------
+    BaseMessage
+        The original message, or a truncated copy with the same id.
+
+    """
+    content = message.content
+    if message.type != "tool" or not isinstance(content, str) or len(content) <= limit:
+        return message
+    # The marker counts toward the limit, so a truncated output is never
+    # truncated again on later model calls
+    keep = limit - len(TRUNCATION_MARKER)
+    if keep <= 0:
+        truncated = content[:limit]
+    else:
+        tail = keep // 2
+        truncated = content[:keep - tail] + TRUNCATION_MARKER + content[len(content) - tail:]
+    return message.model_copy(update={"content": truncated})
+
+
+@functools.lru_cache(maxsize=8)
+def create_trim_messages_middleware(
+    memory_limit: int,
+    context_window_tokens: Optional[int] = None,
+    tool_output_limit: int = TOOL_OUTPUT_CHAR_LIMIT,
+    low_water: Optional[int] = None,
+):
     """Create a trim_messages middleware function with configurable memory limit.
     
+    Trimming can use hysteresis: with ``low_water`` below ``memory_limit``,
+    a history that exceeds the limit is cut down to ``low_water`` messages,
+    so the prompt prefix then stays stable for several turns and
+    provider-side prompt caches keep hitting.
+
+    The middleware is stateless, so instances are cached per set of limits
+    and shared by every agent rebuild using the same settings.
+
     Parameters
     ----------
     memory_limit : int
         Maximum number of messages to keep before trimming.
+    context_window_tokens : int, optional
+        Token budget for the message history. Oldest messages are evicted
+        until the history fits, estimated at ``CHARS_PER_TOKEN`` characters
+        per token. No budget is applied if not provided.
+    tool_output_limit : int, optional
+        Maximum number of characters kept from a single tool output.
+    low_water : int, optional
+        Number of recent messages kept when trimming. Defaults to
+        ``memory_limit``, which trims one message at a time.
     
     Returns
     -------
     function
         Middleware function for trimming messages.
     """
+    budget_chars = (
+        CHARS_PER_TOKEN * context_window_tokens if context_window_tokens else None
+    )
+    if low_water is None:
+        low_water = memory_limit
+
     @before_model
     def trim_messages(state: AgentState, runtime: Runtime) -> dict[str, Any] | None:
         """Keep only the last few messages to fit context window.
@@ -40,15 +182,44 @@ def create_trim_messages_middleware(memory_limit: int):
         """
         messages = state["messages"]
 
-        # Keep first message plus the last memory_limit messages
-        if len(messages) <= memory_limit:
-            return None  # No changes needed
+        # Once over the limit, keep first message plus the last low_water messages
+        start = 1
+        if len(messages) > memory_limit:
+            start = max(1, len(messages) - low_water)
+        kept = [
+            _truncate_tool_output(m, tool_output_limit)
+            for m in islice(messages, start, None)
+        ]
 
-        first_msg = messages[0]
-        recent_messages = messages[-memory_limit:]
-        new_messages = [first_msg] + recent_messages
+        # Evict oldest messages until the history fits the token budget,
+        # always keeping the first message and the latest one
+        evicted = 0
+        if budget_chars is not None:
+            total = _message_chars(messages[0]) + sum(_message_chars(m) for m in kept)
+            while total > budget_chars and evicted < len(kept) - 1:
+                total -= _message_chars(kept[evicted])
+                evicted += 1
+
+        # Don't leave tool results whose tool call was cut, whether by the
+        # low water mark or by the token budget
+        if start + evicted > 1:
+            while evicted < len(kept) - 1 and kept[evicted].type == "tool":
+                evicted += 1
+
+        # Remove evicted messages by id and replace truncated ones in place,
+        # so the rest of the history is left untouched
+        removals = [
+            RemoveMessage(id=m.id) for m in islice(messages, 1, start + evicted)
+        ]
+        replacements = [
+            new
+            for new, old in zip(kept[evicted:], islice(messages, start + evicted, None))
+            if new is not old
+        ]
+        if not removals and not replacements:
+            return None  # No changes needed
 
-        return {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *new_messages]}
+        return {"messages": [*removals, *replacements]}
     
     return trim_messages
 
@@ -73,15 +244,35 @@ class ChatAgent:
         The LLM provider instance.
     agent : object, optional
         Langchain agent instance (if tools are provided).
+    thread_id : str
+        Checkpointer thread holding the current conversation.
 
     """
 
+    __slots__ = (
+        "settings",
+        "provider_name",
+        "model",
+        "tools",
+        "thread_id",
+        "provider",
+        "agent",
+        "_loop",
+        "_loop_thread",
+        "_loop_lock",
+        "_agent_dirty",
+        "_checkpointer",
+        "_mcp_client",
+        "_response_cache",
+    )
+
     def __init__(
         self,
         provider: str = "ollama",
         model: Optional[str] = None,
         settings: Optional[Settings] = None,
         tools: Optional[list] = None,
+        thread_id: str = "1",
     ):
         """Initialize chat agent.
 
@@ -92,9 +283,11 @@ class ChatAgent:
         model : str, optional
             Optional model name override.
         settings : Settings, optional
-            Settings instance (creates new if not provided).
+            Settings instance (uses the shared instance if not provided).
         tools : list, optional
             Optional list of Langchain tools for agent.
+        thread_id : str, optional
+            Checkpointer thread for the conversation. Default is "1".
 
         Raises
         ------
@@ -102,25 +295,38 @@ class ChatAgent:
             If provider name is unknown.
 
         """
-        self.settings = settings or Settings()
+        self.settings = settings or get_settings()
         self.provider_name = provider.lower()
         self.model = model
         self.tools = tools or []
-        self._loop = None  # Event loop for async operations
+        self.thread_id = thread_id
+        self._loop = None  # Background event loop for async operations
+        self._loop_thread = None
+        self._loop_lock = threading.Lock()
+        self._agent_dirty = False  # Set when tools change after the agent is built
+        # Shared across agent rebuilds so conversation memory survives tool changes
+        self._checkpointer = InMemorySaver()
+        self._mcp_client = None  # Created on first use and reused for refreshes
+        self._response_cache: OrderedDict[tuple, str] = OrderedDict()
 
         # Initialize provider
+        provider_cls = PROVIDERS.get(self.provider_name)
+        if provider_cls is None:
+            raise ValueError(f"Unknown provider: {provider}")
         provider_config = self.settings.get_provider_config(self.provider_name)
+        self.provider: BaseProvider = provider_cls(provider_config, self.model)
 
-        if self.provider_name == "ollama":
-            self.provider: BaseProvider = OllamaProvider(provider_config, self.model)
-        elif self.provider_name == "gemini":
-            self.provider: BaseProvider = GeminiProvider(provider_config, self.model)
-        else:
-            raise ValueError(f"Unknown provider: {provider}")
+        if self.settings.enable_llm_cache:
+            enable_llm_cache()
 
         # Load MCP tools if configured
         if self.settings.mcp_url:
-            mcp_tools = self._load_mcp_tools()
+            try:
+                mcp_tools = self._load_mcp_tools()
+            except BaseException:
+                # The caller never gets the agent, so it can't close the loop
+                self.close()
+                raise
             if mcp_tools:
                 self._merge_mcp_tools(mcp_tools)
 
@@ -134,7 +340,9 @@ class ChatAgent:
         Creates a ReAct-style agent with the configured tools and LLM.
 
         """
-        llm = self.provider.get_llm()
+        # The LLM's async client is bound to this agent's event loop, so it
+        # is not shared with other agents through the process-wide cache
+        llm = self.provider.get_llm(shared=False)
 
         # Simple prompt template
         prompt = "You are a helpful AI assistant. Keep responses concise and to the point."
@@ -144,44 +352,70 @@ class ChatAgent:
             prompt += " MCP (Model Context Protocol) tools are available and can be used when needed. Indicate whenever you have used a tool."
 
         # Create trim_messages middleware with configured memory limit
-        trim_messages = create_trim_messages_middleware(self.settings.model_memory_limit)
+        trim_messages = create_trim_messages_middleware(
+            self.settings.model_memory_limit,
+            self.settings.context_window_tokens,
+            low_water=self.settings.memory_low_water,
+        )
 
         self.agent = create_agent(
             model=llm,
             tools=self.tools,
             system_prompt=prompt,
             middleware=[trim_messages],
-            checkpointer=InMemorySaver(),
+            checkpointer=self._checkpointer,
         )
 
-    def _get_or_create_loop(self):
-        """Get existing event loop or create a new one.
-        
+    def _ensure_agent(self):
+        """Rebuild the Langchain agent if tools changed since it was built."""
+        if self._agent_dirty or self.agent is None:
+            self._initialize_agent()
+            self._agent_dirty = False
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Get the background event loop, starting it on first use.
+
+        The loop runs forever in a daemon thread, so coroutines can be
+        submitted from sync code (or from another running loop) without
+        creating a new loop per call.
+
         Returns
         -------
         asyncio.AbstractEventLoop
-            An active event loop.
-        
+            The running background event loop.
+
         """
-        if self._loop is None or self._loop.is_closed():
-            try:
-                # Try to get the current event loop (if we're in an async context)
-                _ = asyncio.get_running_loop()
-                # If we're here, we're in an async context, so we can't use run_until_complete
-                # This shouldn't happen in our sync invoke() method, but handle it gracefully
-                return None
-            except RuntimeError:
-                # No running loop, check if there's a loop set but not running
-                try:
-                    self._loop = asyncio.get_event_loop()
-                    if self._loop.is_closed():
-                        raise RuntimeError("Event loop is closed")
-                except RuntimeError:
-                    # No event loop exists or it's closed, create a new one
-                    self._loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(self._loop)
+        loop = self._loop
+        if loop is not None:
+            return loop
+
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="chat-agent-loop", daemon=True
+                )
+                thread.start()
+                self._loop_thread = thread
+                self._loop = loop
         return self._loop
 
+    def _run(self, coro):
+        """Run a coroutine on the background loop and wait for its result.
+
+        Parameters
+        ----------
+        coro : coroutine
+            Coroutine to run.
+
+        Returns
+        -------
+        object
+            Result of the coroutine.
+
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop()).result()
+
     def invoke(self, message: str) -> str:
         """Invoke the agent with a message.
 
@@ -196,38 +430,229 @@ class ChatAgent:
             Agent response text.
 
         """
+        cache_key, cached = self._get_cached_response(message)
+        if cached is not None:
+            self._run(self._arecord_exchange(message, cached))
+            return cached
+
+        self._ensure_agent()
+
         # Invoke the agent asynchronously to support async MCP tools
         # Memory is managed by the checkpointer
-        # Reuse event loop to avoid "Event loop is closed" errors
-        loop = self._get_or_create_loop()
-        
-        # Run the coroutine in the existing loop
-        if loop is None or loop.is_running():
-            # If we're in an async context or loop is running, use asyncio.run() as fallback
-            # This creates a new loop, but it's necessary in this case
-            response = asyncio.run(
-                self.agent.ainvoke(
-                    {"messages": [{"role": "user", "content": message}]},
-                    {"configurable": {"thread_id": "1"}},
-                )
-            )
-        else:
-            # Use the existing loop (reuse it to avoid closing/reopening)
-            response = loop.run_until_complete(
-                self.agent.ainvoke(
-                    {"messages": [{"role": "user", "content": message}]},
-                    {"configurable": {"thread_id": "1"}},
-                )
+        response = self._run(
+            self.agent.ainvoke(
+                {"messages": [{"role": "user", "content": message}]},
+                {"configurable": {"thread_id": self.thread_id}},
             )
+        )
 
         # Extract the last AI message content from the response
         # The response contains a "messages" list with all conversation messages
         response_text = response["messages"][-1].content
+        self._cache_response(cache_key, response_text)
 
         return response_text
 
+    def _get_cached_response(self, message: str) -> tuple[Optional[tuple], Optional[str]]:
+        """Look up a cached response for a message.
+
+        Parameters
+        ----------
+        message : str
+            User message text.
+
+        Returns
+        -------
+        tuple
+            Cache key (None if caching is disabled) and the cached response
+            text (None on a miss).
+
+        """
+        if not self.settings.response_cache_size:
+            return None, None
+
+        normalized = message.strip().lower()
+        digest = hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+        key = (self.provider_name, self.get_model_name(), self.thread_id, digest)
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            self._response_cache.move_to_end(key)
+        return key, cached
+
+    async def _arecord_exchange(self, message: str, response_text: str):
+        """Append a cache-served exchange to the conversation thread.
+
+        Keeps the history complete when the model is skipped, so later
+        messages still see the question and its answer.
+
+        Parameters
+        ----------
+        message : str
+            User message text.
+        response_text : str
+            Cached agent response text.
+
+        """
+        self._ensure_agent()
+        await self.agent.aupdate_state(
+            {"configurable": {"thread_id": self.thread_id}},
+            {"messages": [HumanMessage(message), AIMessage(response_text)]},
+            as_node="model",
+        )
+
+    def _cache_response(self, key: Optional[tuple], response_text: str):
+        """Store a response in the LRU response cache.
+
+        Parameters
+        ----------
+        key : tuple, optional
+            Cache key from ``_get_cached_response``; nothing is stored if None.
+        response_text : str
+            Agent response text.
+
+        """
+        if key is None:
+            return
+        self._response_cache[key] = response_text
+        if len(self._response_cache) > self.settings.response_cache_size:
+            self._response_cache.popitem(last=False)
+
+    async def abatch(
+        self, messages: list[str], max_concurrency: Optional[int] = None
+    ) -> list[str | Exception]:
+        """Invoke the agent on independent messages concurrently.
+
+        Each message runs in its own conversation thread, so messages don't
+        share history with each other or with the main conversation.
+
+        Parameters
+        ----------
+        messages : list[str]
+            User message texts.
+        max_concurrency : int, optional
+            Maximum number of in-flight requests. Defaults to the
+            ``max_concurrency`` setting.
+
+        Returns
+        -------
+        list[str | Exception]
+            Response text for each message, in input order, or the exception
+            raised while processing it.
+
+        """
+        self._ensure_agent()
+        thread_ids = [uuid.uuid4().hex for _ in messages]
+        configs = [
+            {
+                "configurable": {"thread_id": thread_id},
+                "max_concurrency": max_concurrency or self.settings.max_concurrency,
+            }
+            for thread_id in thread_ids
+        ]
+        try:
+            responses = await self.agent.abatch(
+                [{"messages": [{"role": "user", "content": m}]} for m in messages],
+                configs,
+                return_exceptions=True,
+            )
+        finally:
+            # One-off threads are not needed once the batch is done
+            for thread_id in thread_ids:
+                self._checkpointer.delete_thread(thread_id)
+
+        return [
+            r if isinstance(r, Exception) else r["messages"][-1].content
+            for r in responses
+        ]
+
+    def batch(
+        self, messages: list[str], max_concurrency: Optional[int] = None
+    ) -> list[str | Exception]:
+        """Invoke the agent on independent messages concurrently (sync wrapper).
+
+        Parameters
+        ----------
+        messages : list[str]
+            User message texts.
+        max_concurrency : int, optional
+            Maximum number of in-flight requests. Defaults to the
+            ``max_concurrency`` setting.
+
+        Returns
+        -------
+        list[str | Exception]
+            Response text for each message, in input order, or the exception
+            raised while processing it.
+
+        """
+        return self._run(self.abatch(messages, max_concurrency))
+
+    async def ainvoke_stream(self, message: str) -> AsyncIterator[str]:
+        """Stream the agent response to a message as it is generated.
+
+        Parameters
+        ----------
+        message : str
+            User message text.
+
+        Yields
+        ------
+        str
+            Text chunks of the agent response.
+
+        """
+        cache_key, cached = self._get_cached_response(message)
+        if cached is not None:
+            await self._arecord_exchange(message, cached)
+            yield cached
+            return
+
+        self._ensure_agent()
+        chunks = []
+        async for event in self.agent.astream_events(
+            {"messages": [{"role": "user", "content": message}]},
+            {"configurable": {"thread_id": self.thread_id}},
+            version="v2",
+        ):
+            if event["event"] == "on_chat_model_stream":
+                text = content_text(event["data"]["chunk"].content)
+                if text:
+                    chunks.append(text)
+                    yield text
+        self._cache_response(cache_key, "".join(chunks))
+
+    def stream(self, message: str) -> Iterator[str]:
+        """Stream the agent response to a message (sync wrapper).
+
+        Drives ``ainvoke_stream`` on the background event loop so chunks can
+        be displayed as soon as they arrive.
+
+        Parameters
+        ----------
+        message : str
+            User message text.
+
+        Yields
+        ------
+        str
+            Text chunks of the agent response.
+
+        """
+        chunks = self.ainvoke_stream(message)
+        try:
+            while True:
+                try:
+                    yield self._run(anext(chunks))
+                except StopAsyncIteration:
+                    break
+        finally:
+            self._run(chunks.aclose())
+
     def add_tool(self, tool):
-        """Add a tool to the agent (requires reinitialization).
+        """Add a tool to the agent.
+
+        The agent is rebuilt lazily on the next invocation, so adding several
+        tools in a row only rebuilds it once.
 
         Parameters
         ----------
@@ -236,8 +661,19 @@ class ChatAgent:
 
         """
         self.tools.append(tool)
-        if self.tools:
-            self._initialize_agent()
+        self._agent_dirty = True
+
+    def add_tools(self, tools: list):
+        """Add several tools to the agent at once.
+
+        Parameters
+        ----------
+        tools : list
+            Langchain tool instances.
+
+        """
+        self.tools.extend(tools)
+        self._agent_dirty = True
 
     def get_model_name(self) -> str:
         """Get the actual model name being used by the provider.
@@ -253,26 +689,31 @@ class ChatAgent:
     def clear_history(self):
         """Clear message history.
 
-        Note: This method currently does not clear the checkpointer's memory.
-        To start a fresh conversation, use a different thread_id when invoking
-        the agent, or create a new agent instance.
+        Switches to a new checkpointer thread and frees the old one, so the
+        next message starts a fresh conversation without rebuilding the agent.
+        Cached responses from the old conversation are dropped as well.
 
         """
-        # Memory is managed by the checkpointer, not a local list
-        # To clear history, use a different thread_id or create a new agent
-        pass
+        old_thread_id = self.thread_id
+        self.thread_id = uuid.uuid4().hex
+        self._checkpointer.delete_thread(old_thread_id)
+        self._response_cache.clear()
 
     def close(self):
-        """Close the event loop and clean up resources.
+        """Stop the background event loop and clean up resources.
         
         Call this method when you're done with the agent to properly
         clean up the event loop. This is optional but recommended for
         long-running applications.
         
         """
-        if self._loop is not None and not self._loop.is_closed():
-            self._loop.close()
-            self._loop = None
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = self._loop_thread = None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
 
     def _load_mcp_tools(self) -> list:
         """Load tools from MCP server and convert to LangChain tool format.
@@ -286,28 +727,17 @@ class ChatAgent:
         if not self.settings.mcp_url:
             return []
 
+        # Fail fast when nothing is listening instead of waiting out the timeout
+        if not _mcp_server_reachable(self.settings.mcp_url):
+            logger.warning(f"MCP server at {self.settings.mcp_url} is unreachable, continuing without MCP tools")
+            return []
+
+        timeout = self.settings.mcp_timeout
         try:
-            # Create MCP client with streamable HTTP transport
-            client = MultiServerMCPClient({
-                "mcp_server": {
-                    "transport": "streamable_http",
-                    "url": self.settings.mcp_url
-                }
-            })
+            client = self._get_mcp_client()
 
             # Fetch tools (async method called from sync context)
-            # Reuse event loop to avoid "Event loop is closed" errors
-            loop = self._get_or_create_loop()
-            if loop is None or loop.is_running():
-                # If we're in an async context or loop is running, use asyncio.run() as fallback
-                mcp_tools = asyncio.run(
-                    asyncio.wait_for(client.get_tools(), timeout=5.0)
-                )
-            else:
-                # Use the existing loop (reuse it to avoid closing/reopening)
-                mcp_tools = loop.run_until_complete(
-                    asyncio.wait_for(client.get_tools(), timeout=5.0)
-                )
+            mcp_tools = self._run(asyncio.wait_for(client.get_tools(), timeout=timeout))
 
             if not mcp_tools:
                 logger.warning("MCP server provided no tools")
@@ -316,7 +746,7 @@ class ChatAgent:
             return mcp_tools
 
         except asyncio.TimeoutError:
-            logger.error("Failed to load MCP tools: timeout after 5 seconds")
+            logger.error(f"Failed to load MCP tools: timeout after {timeout} seconds")
             return []
         except ConnectionError as e:
             logger.error(f"Failed to load MCP tools: connection error - {e}")
@@ -324,10 +754,48 @@ class ChatAgent:
         except ValueError as e:
             logger.error(f"Failed to load MCP tools: invalid URL - {e}")
             return []
-        except Exception as e:
+        except (OSError, RuntimeError, McpError, httpx.HTTPError, ExceptionGroup) as e:
+            # Transport failures from the MCP client's task group arrive as an
+            # ExceptionGroup; anything else is a bug and should propagate
             logger.error(f"Failed to load MCP tools: {e}")
             return []
 
+    def _get_mcp_client(self) -> MultiServerMCPClient:
+        """Get the MCP client, creating it on first use.
+
+        Returns
+        -------
+        MultiServerMCPClient
+            MCP client configured with the streamable HTTP transport.
+
+        """
+        if self._mcp_client is None:
+            self._mcp_client = MultiServerMCPClient({
+                "mcp_server": {
+                    "transport": "streamable_http",
+                    "url": self.settings.mcp_url
+                }
+            })
+        return self._mcp_client
+
+    def refresh_mcp_tools(self) -> list:
+        """Reload tools from the MCP server using the existing client.
+
+        Refreshed tools replace tools with the same name; the agent is
+        rebuilt on the next invocation.
+
+        Returns
+        -------
+        list
+            List of LangChain tool objects from MCP server, or empty list on error.
+
+        """
+        mcp_tools = self._load_mcp_tools()
+        if mcp_tools:
+            self._merge_mcp_tools(mcp_tools)
+            self._agent_dirty = True
+        return mcp_tools
+
     def _merge_mcp_tools(self, mcp_tools: list):
         """Merge MCP tools with existing tools, with MCP tools taking precedence.
 
@@ -337,25 +805,19 @@ class ChatAgent:
             List of MCP tools to merge.
 
         """
-        # Create a dictionary of existing tools by name for conflict detection
-        existing_tool_names = {tool.name for tool in self.tools if hasattr(tool, 'name')}
+        # Index existing tools by name so each conflict check is a single lookup
+        unnamed = [tool for tool in self.tools if not hasattr(tool, 'name')]
+        by_name = {tool.name: tool for tool in self.tools if hasattr(tool, 'name')}
 
-        # Check for conflicts and log warnings
         for tool in mcp_tools:
-            if hasattr(tool, 'name') and tool.name in existing_tool_names:
+            if not hasattr(tool, 'name'):
+                unnamed.append(tool)
+                continue
+            if tool.name in by_name:
                 logger.warning(
                     f"MCP tool '{tool.name}' conflicts with existing tool, MCP tool will be used"
                 )
+            # MCP tools take precedence over existing tools with the same name
+            by_name[tool.name] = tool
 
-        # Remove conflicting existing tools
-        self.tools = [
-            tool for tool in self.tools
-            if not (hasattr(tool, 'name') and any(
-                mcp_tool.name == tool.name
-                for mcp_tool in mcp_tools
-                if hasattr(mcp_tool, 'name')
-            ))
-        ]
-
-        # Add all MCP tools (they take precedence)
-        self.tools.extend(mcp_tools)
+        self.tools = unnamed + list(by_name.values())
@@ -2,10 +2,17 @@
 
 import click
 import sys
-from typing import Optional
+from itertools import islice
+from typing import Iterable, Optional
 
 from chat_bot.agent.agent import ChatAgent
-from chat_bot.config.settings import Settings
+from chat_bot.config.settings import get_settings
+
+# Number of stdin lines sent to the agent per batch in non-interactive mode
+BATCH_SIZE = 32
+
+# Commands that end an interactive session (case-insensitive)
+_EXIT_COMMANDS = frozenset({"exit", "quit"})
 
 
 @click.group()
@@ -34,7 +41,12 @@ def cli():
     type=str,
     help="Model name to use (provider-specific)",
 )
-def chat(provider: str, model: Optional[str]):
+@click.option(
+    "--interactive/--no-interactive",
+    default=True,
+    help="Prompt for messages, or answer each line read from stdin",
+)
+def chat(provider: str, model: Optional[str], interactive: bool):
     """Start an interactive chat session.
 
     Parameters
@@ -43,12 +55,19 @@ def chat(provider: str, model: Optional[str]):
         LLM provider to use ("ollama" or "gemini").
     model : str, optional
         Model name to use (provider-specific).
+    interactive : bool
+        Whether to prompt for messages or read them from stdin.
 
     """
-    settings = Settings()
+    settings = get_settings()
 
     # Initialize agent with selected provider
     agent = ChatAgent(provider=provider, model=model, settings=settings)
+
+    if not interactive:
+        _answer_lines(agent, sys.stdin, settings.max_concurrency)
+        return
+
     model_name = agent.get_model_name()
     tool_names = [tool.name for tool in agent.tools]
 
@@ -61,19 +80,55 @@ def chat(provider: str, model: Optional[str]):
 
     while True:
         try:
-            user_input = click.prompt("You", type=str, default="")
-            if user_input.lower() in ["exit", "quit"]:
+            # Plain stdin reads avoid click.prompt's per-call terminal setup
+            sys.stdout.write("You: ")
+            sys.stdout.flush()
+            line = sys.stdin.readline()
+            if not line:
+                click.echo("\nExiting...")
+                break
+            user_input = line.strip()
+            if not user_input:
+                continue
+            # Only lowercase inputs that could be an exit command
+            if user_input[:1] in ("e", "E", "q", "Q") and user_input.lower() in _EXIT_COMMANDS:
                 break
 
-            response = agent.invoke(user_input)
-            click.echo(f"Bot [{model_name}]: {response}")
-        except (KeyboardInterrupt, click.Abort):
+            # Stream chunks as they arrive to cut time-to-first-token
+            click.echo(f"Bot [{model_name}]: ", nl=False)
+            for chunk in agent.stream(user_input):
+                click.echo(chunk, nl=False)
+            click.echo()
+        except KeyboardInterrupt:
             click.echo("\nExiting...")
             break
         except Exception as e:
             click.echo(f"Error: {e}", err=True)
 
 
+def _answer_lines(agent: ChatAgent, lines: Iterable[str], max_concurrency: int):
+    """Answer each non-empty line independently, in concurrent batches.
+
+    Parameters
+    ----------
+    agent : ChatAgent
+        Agent used to answer the messages.
+    lines : Iterable[str]
+        Input lines, one message per line.
+    max_concurrency : int
+        Maximum number of concurrent requests per batch.
+
+    """
+    messages = (line.strip() for line in lines)
+    messages = (message for message in messages if message)
+    while batch := list(islice(messages, BATCH_SIZE)):
+        for response in agent.batch(batch, max_concurrency=max_concurrency):
+            if isinstance(response, Exception):
+                click.echo(f"Error: {response}", err=True)
+            else:
+                click.echo(response)
+
+
 @cli.command()
 @click.argument("message", required=True)
 @click.option(
@@ -102,7 +157,7 @@ def run(message: str, provider: str, model: Optional[str]):
         Model name to use (provider-specific).
 
     """
-    settings = Settings()
+    settings = get_settings()
 
     agent = ChatAgent(provider=provider, model=model, settings=settings)
 
@@ -1,15 +1,126 @@
 """Configuration management for Chat-Bot-Prototype."""
 
+import functools
 import os
-from typing import Optional
+import re
+from dataclasses import dataclass, field
+from typing import Any, Optional
 from dotenv import load_dotenv
 
+# Provider base URLs must name an HTTP(S) host
+_BASE_URL_PATTERN = re.compile(r"https?://[^\s/]+")
 
+
+@functools.lru_cache(maxsize=1)
+def _load_env():
+    """Load the .env file once per process."""
+    load_dotenv()
+
+
+class _ProviderConfigMixin:
+    """Dict-style read access for provider configuration dataclasses."""
+
+    __slots__ = ()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a configuration value by name.
+
+        Parameters
+        ----------
+        key : str
+            Field name.
+        default : object, optional
+            Value returned if the field does not exist.
+
+        Returns
+        -------
+        object
+            Field value, or ``default``.
+
+        """
+        return getattr(self, key, default)
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class OllamaConfig(_ProviderConfigMixin):
+    """Validated configuration for the Ollama provider.
+
+    Attributes
+    ----------
+    base_url : str
+        Base URL for the Ollama API.
+    model : str
+        Ollama model name.
+    prompt_cache_size : int
+        Number of responses cached for repeated prompts (0 disables).
+
+    Raises
+    ------
+    ValueError
+        If the model name is empty or the base URL is not an HTTP(S) URL.
+
+    """
+
+    base_url: str = "http://localhost:11434"
+    model: str
+    prompt_cache_size: int = 0
+
+    def __post_init__(self):
+        """Validate the configuration once, when it is created."""
+        if not self.model:
+            raise ValueError("Ollama model name is required")
+        if not _BASE_URL_PATTERN.match(self.base_url or ""):
+            raise ValueError(f"Invalid Ollama base URL: {self.base_url!r}")
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class GeminiConfig(_ProviderConfigMixin):
+    """Validated configuration for the Gemini provider.
+
+    Attributes
+    ----------
+    api_key : str
+        Google Gemini API key.
+    model : str
+        Gemini model name.
+    prompt_cache_size : int
+        Number of responses cached for repeated prompts (0 disables).
+    requests_per_minute : int
+        Client-side limit on requests sent to the API (0 disables).
+
+    Raises
+    ------
+    ValueError
+        If the API key or model name is empty.
+
+    """
+
+    api_key: str = field(default="", repr=False)
+    model: str
+    prompt_cache_size: int = 0
+    requests_per_minute: int = 60
+
+    def __post_init__(self):
+        """Validate the configuration once, when it is created."""
+        if not self.api_key:
+            raise ValueError("Gemini API key is required")
+        if not self.model:
+            raise ValueError("Gemini model name is required")
+
+
+# Validated provider configuration, as returned by Settings.get_provider_config
+ProviderConfig = OllamaConfig | GeminiConfig
+
+
+@dataclass(frozen=True, slots=True)
 class Settings:
     """Application settings loaded from environment variables.
 
-    This class manages configuration for different LLM providers by loading
-    settings from environment variables or a .env file.
+    This class manages configuration for different LLM providers. Use
+    ``Settings.from_env()`` to load settings from environment variables or
+    a .env file; calling ``Settings()`` directly only uses the field
+    defaults and explicit arguments. Instances are immutable, use
+    ``dataclasses.replace`` to derive modified settings.
 
     Attributes
     ----------
@@ -23,34 +134,61 @@ class Settings:
         Default Gemini model name.
     model_memory_limit : int
         Maximum number of messages to keep in memory before trimming.
+    memory_low_water : int, optional
+        Number of recent messages kept after trimming
+        (``model_memory_limit`` if not set).
+    context_window_tokens : int
+        Approximate token budget for the message history sent to the model.
+    response_cache_size : int
+        Number of agent responses to cache for repeated messages (0 disables).
+    max_concurrency : int
+        Maximum number of concurrent requests when processing a batch.
+    enable_llm_cache : bool
+        Whether to cache LLM responses to identical prompts in memory.
+    prompt_cache_size : int
+        Number of responses each provider caches for repeated direct
+        ``invoke`` prompts (0 disables).
+    gemini_requests_per_minute : int
+        Maximum number of requests per minute sent to the Gemini API
+        (0 disables the limit).
     mcp_url : str, optional
         URL of the MCP server endpoint for tool integration.
+    mcp_timeout : float
+        Seconds to wait for the MCP server to provide its tools.
 
     """
 
-    def __init__(self):
-        """Load environment variables from .env file if present.
+    ollama_base_url: str = "http://localhost:11434"
+    ollama_model: str = "llama3.2"
+    gemini_api_key: Optional[str] = None
+    gemini_model: str = "gemini-2.5-flash"
+    model_memory_limit: int = 10
+    memory_low_water: Optional[int] = None
+    context_window_tokens: int = 8192
+    response_cache_size: int = 0
+    max_concurrency: int = 8
+    enable_llm_cache: bool = False
+    prompt_cache_size: int = 0
+    gemini_requests_per_minute: int = 60
+    mcp_url: Optional[str] = None
+    mcp_timeout: float = 5.0
 
-        Initializes all provider-specific settings from environment variables
-        with default values where appropriate.
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Load settings from environment variables and .env file if present.
 
-        """
-        load_dotenv()
+        Reads all provider-specific settings from environment variables
+        with default values where appropriate.
 
-        # Ollama configuration
-        self.ollama_base_url: str = os.getenv(
-            "OLLAMA_BASE_URL", "http://localhost:11434"
-        )
-        self.ollama_model: str = os.getenv("OLLAMA_MODEL", "llama3.2")
+        Returns
+        -------
+        Settings
+            Settings populated from the environment.
 
-        # Google Gemini configuration
-        self.gemini_api_key: Optional[str] = os.getenv("GEMINI_API_KEY")
-        self.gemini_model: str = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+        """
+        _load_env()
 
-        # Memory configuration
-        self.model_memory_limit: int = int(
-            os.getenv("MODEL_MEMORY_LIMIT", "10")
-        )
+        low_water = os.getenv("MEMORY_LOW_WATER")
 
         # MCP configuration
         mcp_url = os.getenv("MCP_URL")
@@ -58,7 +196,27 @@ class Settings:
             mcp_url = mcp_url.strip()
             if not mcp_url:
                 mcp_url = None
-        self.mcp_url: Optional[str] = mcp_url
+
+        return cls(
+            # Ollama configuration
+            ollama_base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+            ollama_model=os.getenv("OLLAMA_MODEL", "llama3.2"),
+            # Google Gemini configuration
+            gemini_api_key=os.getenv("GEMINI_API_KEY"),
+            gemini_model=os.getenv("GEMINI_MODEL", "gemini-2.5-flash"),
+            # Memory configuration
+            model_memory_limit=int(os.getenv("MODEL_MEMORY_LIMIT", "10")),
+            memory_low_water=int(low_water) if low_water else None,
+            context_window_tokens=int(os.getenv("CONTEXT_WINDOW_TOKENS", "8192")),
+            response_cache_size=int(os.getenv("RESPONSE_CACHE_SIZE", "0")),
+            max_concurrency=int(os.getenv("MAX_CONCURRENCY", "8")),
+            enable_llm_cache=os.getenv("ENABLE_LLM_CACHE", "false").strip().lower()
+            in ("1", "true", "yes"),
+            prompt_cache_size=int(os.getenv("PROMPT_CACHE_SIZE", "0")),
+            gemini_requests_per_minute=int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "60")),
+            mcp_url=mcp_url,
+            mcp_timeout=float(os.getenv("MCP_TIMEOUT", "5")),
+        )
 
     def validate(self) -> bool:
         """Validate that required settings are present.
@@ -73,8 +231,8 @@ class Settings:
         # Gemini requires API key
         return True  # Basic validation - can be extended
 
-    def get_provider_config(self, provider: str) -> dict:
-        """Get configuration dictionary for a specific provider.
+    def get_provider_config(self, provider: str) -> ProviderConfig:
+        """Get the validated configuration for a specific provider.
 
         Parameters
         ----------
@@ -83,8 +241,8 @@ class Settings:
 
         Returns
         -------
-        dict
-            Configuration dictionary for the provider.
+        OllamaConfig or GeminiConfig
+            Configuration for the provider.
 
         Raises
         ------
@@ -93,18 +251,34 @@ class Settings:
 
         """
         if provider.lower() == "ollama":
-            return {
-                "base_url": self.ollama_base_url,
-                "model": self.ollama_model,
-            }
+            return OllamaConfig(
+                base_url=self.ollama_base_url,
+                model=self.ollama_model,
+                prompt_cache_size=self.prompt_cache_size,
+            )
         elif provider.lower() == "gemini":
             if not self.gemini_api_key:
                 raise ValueError(
                     "GEMINI_API_KEY environment variable is required for Gemini provider"
                 )
-            return {
-                "api_key": self.gemini_api_key,
-                "model": self.gemini_model,
-            }
+            return GeminiConfig(
+                api_key=self.gemini_api_key,
+                model=self.gemini_model,
+                prompt_cache_size=self.prompt_cache_size,
+                requests_per_minute=self.gemini_requests_per_minute,
+            )
         else:
             raise ValueError(f"Unknown provider: {provider}")
+
+
+@functools.lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the process-wide Settings instance.
+
+    Returns
+    -------
+    Settings
+        Settings loaded from the environment on first call.
+
+    """
+    return Settings.from_env()
@@ -0,0 +1,90 @@
+"""Process-wide cache of Langchain LLM instances shared by providers."""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from langchain_core.caches import InMemoryCache
+from langchain_core.globals import get_llm_cache, set_llm_cache
+
+# Maximum number of distinct LLM instances kept alive
+MAX_CACHED_LLMS = 32
+
+_llms: OrderedDict[Hashable, Any] = OrderedDict()
+_lock = threading.Lock()
+
+
+def secret_digest(secret: str) -> str:
+    """Hash a secret so it can be used in a cache key without storing it.
+
+    Parameters
+    ----------
+    secret : str
+        Secret value, such as an API key.
+
+    Returns
+    -------
+    str
+        Hex digest of the secret.
+
+    """
+    return hashlib.blake2s(secret.encode()).hexdigest()
+
+
+def get_cached_llm(key: Hashable, build: Callable[[], Any]) -> Any:
+    """Get the LLM instance for a key, building it on first use.
+
+    Reusing instances across providers keeps each SDK client, and its
+    warm connection pool, alive for the whole process.
+
+    Parameters
+    ----------
+    key : Hashable
+        Cache key identifying the provider, model, and endpoint or credentials.
+    build : Callable[[], object]
+        Function that builds the LLM instance on a cache miss.
+
+    Returns
+    -------
+    object
+        Langchain LLM instance.
+
+    """
+    with _lock:
+        llm = _llms.get(key)
+        if llm is not None:
+            _llms.move_to_end(key)
+            return llm
+
+    # Build outside the lock; building may do network I/O
+    llm = build()
+
+    with _lock:
+        llm = _llms.setdefault(key, llm)
+        _llms.move_to_end(key)
+        if len(_llms) > MAX_CACHED_LLMS:
+            _llms.popitem(last=False)
+    return llm
+
+
+def enable_llm_cache():
+    """Cache LLM responses to identical prompts for the rest of the process.
+
+    Installs Langchain's in-memory cache as the global LLM cache unless a
+    cache is already configured.
+
+    """
+    if get_llm_cache() is None:
+        set_llm_cache(InMemoryCache())
+
+
+def disable_llm_cache():
+    """Remove the global LLM response cache installed by ``enable_llm_cache``."""
+    set_llm_cache(None)
+
+
+def clear_cached_llms():
+    """Drop all cached LLM instances."""
+    with _lock:
+        _llms.clear()
@@ -0,0 +1,122 @@
+"""Client-side rate limiting for provider requests."""
+
+import asyncio
+import threading
+import time
+from typing import Optional
+
+from langchain_core.rate_limiters import BaseRateLimiter
+
+
+class TokenBucket(BaseRateLimiter):
+    """Token bucket limiting requests to a provider's per-minute quota.
+
+    The bucket starts full, so the first ``burst`` requests go out without
+    delay; later requests are spaced to the average rate. The default burst
+    holds ten seconds' worth of requests, so the model calls of one agent
+    turn or a small batch are not serialized. Waiting callers reserve their
+    slot up front, so concurrent threads and coroutines are released in
+    order instead of polling. Pass an instance as a Langchain chat model's
+    ``rate_limiter`` to cover sync, async, batch, and streaming calls alike.
+
+    Attributes
+    ----------
+    rate : float
+        Requests allowed per second.
+    burst : int
+        Maximum number of requests sent back to back.
+
+    """
+
+    def __init__(self, requests_per_minute: float, burst: Optional[int] = None):
+        """Initialize the token bucket.
+
+        Parameters
+        ----------
+        requests_per_minute : float
+            Average number of requests allowed per minute.
+        burst : int, optional
+            Maximum number of requests sent back to back. Defaults to
+            ``max(1, requests_per_minute // 6)``.
+
+        Raises
+        ------
+        ValueError
+            If ``requests_per_minute`` or ``burst`` is not positive.
+
+        """
+        if burst is None:
+            burst = max(1, int(requests_per_minute // 6))
+        if requests_per_minute <= 0 or burst < 1:
+            raise ValueError("requests_per_minute and burst must be positive")
+        self.rate = requests_per_minute / 60.0
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, blocking: bool) -> float | None:
+        """Take a token, borrowing against future refills if blocking.
+
+        Parameters
+        ----------
+        blocking : bool
+            Whether the caller will wait for a token that is not yet available.
+
+        Returns
+        -------
+        float or None
+            Seconds to wait before sending the request, or None if no token
+            is available and ``blocking`` is False.
+
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1 and not blocking:
+                return None
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        """Wait until a request may be sent.
+
+        Parameters
+        ----------
+        blocking : bool, optional
+            If False, return immediately instead of waiting.
+
+        Returns
+        -------
+        bool
+            True if the request may be sent.
+
+        """
+        wait = self._reserve(blocking)
+        if wait is None:
+            return False
+        if wait:
+            time.sleep(wait)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        """Wait until a request may be sent, without blocking the event loop.
+
+        Parameters
+        ----------
+        blocking : bool, optional
+            If False, return immediately instead of waiting.
+
+        Returns
+        -------
+        bool
+            True if the request may be sent.
+
+        """
+        wait = self._reserve(blocking)
+        if wait is None:
+            return False
+        if wait:
+            await asyncio.sleep(wait)
+        return True
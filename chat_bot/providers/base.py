@@ -1,7 +1,83 @@
 """Base provider interface for LLM providers."""
 
+import hashlib
+import threading
 from abc import ABC, abstractmethod
-from typing import Optional
+from collections import OrderedDict
+from typing import Any, Hashable, Iterator, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from chat_bot.config.settings import ProviderConfig
+from chat_bot.providers._cache import get_cached_llm
+
+
+def _llm_input(prompt: str, system_prompt: Optional[str] = None):
+    """Build the LLM input for a prompt and optional system prompt.
+
+    Parameters
+    ----------
+    prompt : str
+        User prompt text.
+    system_prompt : str, optional
+        Instructions sent as a separate system message.
+
+    Returns
+    -------
+    str or list
+        The prompt itself, or a system message followed by a human message.
+
+    """
+    if system_prompt is None:
+        return prompt
+    return [SystemMessage(content=system_prompt), HumanMessage(content=prompt)]
+
+
+def content_text(content: Any) -> str:
+    """Extract plain text from message content.
+
+    Parameters
+    ----------
+    content : str or list
+        Message content, either a string or a list of content parts.
+
+    Returns
+    -------
+    str
+        Concatenated text of the string parts and the ``text`` of dict
+        parts; other parts, such as images, contribute nothing.
+
+    """
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part if isinstance(part, str) else part.get("text", "")
+        for part in content
+        if isinstance(part, (str, dict))
+    )
+
+
+def _response_text(response: Any) -> str:
+    """Extract the text from an LLM response.
+
+    Parameters
+    ----------
+    response : object
+        LLM response, either a string or a message with string or
+        list-of-parts content.
+
+    Returns
+    -------
+    str
+        Response text.
+
+    """
+    if isinstance(response, str):
+        return response
+    content = getattr(response, "content", None)
+    if content is None:
+        return str(response)
+    return content_text(content)
 
 
 class BaseProvider(ABC):
@@ -12,22 +88,26 @@ class BaseProvider(ABC):
 
     Attributes
     ----------
-    config : dict
-        Provider-specific configuration dictionary.
+    config : dict or ProviderConfig
+        Provider-specific configuration, as a dictionary or a validated
+        configuration dataclass.
     model : str, optional
         Model name to use.
     _llm : object, optional
         Cached Langchain LLM instance.
+    _prompt_cache : OrderedDict
+        LRU cache of responses keyed by model and prompt digest, holding at
+        most ``config["prompt_cache_size"]`` entries (0 disables it).
 
     """
 
-    def __init__(self, config: dict, model: Optional[str] = None):
+    def __init__(self, config: dict | ProviderConfig, model: Optional[str] = None):
         """Initialize provider with configuration.
 
         Parameters
         ----------
-        config : dict
-            Provider-specific configuration dictionary.
+        config : dict or ProviderConfig
+            Provider-specific configuration.
         model : str, optional
             Optional model name override.
 
@@ -35,27 +115,113 @@ class BaseProvider(ABC):
         self.config = config
         self.model = model or config.get("model")
         self._llm = None
+        self._llm_lock = threading.Lock()
+        self._prompt_cache_size = config.get("prompt_cache_size", 0)
+        self._prompt_cache: OrderedDict[tuple, Any] = OrderedDict()
 
-    @abstractmethod
-    def get_llm(self):
+    def get_llm(self, shared: bool = True):
         """Get the Langchain LLM instance for this provider.
 
+        The instance is built on first use and kept by the provider. Shared
+        instances are also cached process-wide under ``_llm_cache_key()``, so
+        other providers with the same configuration reuse one LLM client and
+        its connection pool.
+
+        Parameters
+        ----------
+        shared : bool, optional
+            Whether to use the process-wide cache. Pass False when the LLM
+            will be used from a dedicated event loop: async SDK clients are
+            bound to the loop they first ran on and must not be shared with
+            other loops. Only the first call decides. Default is True.
+
         Returns
         -------
         object
             Langchain LLM instance.
 
         """
-        pass
+        # Double-checked so concurrent first calls build the LLM only once
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    if shared:
+                        self._llm = get_cached_llm(self._llm_cache_key(), self._build_llm)
+                    else:
+                        self._llm = self._build_llm()
+        return self._llm
+
+    def _llm_cache_key(self) -> Hashable:
+        """Get the key identifying this provider's LLM in the shared cache.
+
+        Returns
+        -------
+        Hashable
+            Cache key; providers with equal keys share one LLM instance.
+
+        """
+        return (type(self).__name__, self.model)
 
     @abstractmethod
-    def invoke(self, prompt: str) -> str:
+    def _build_llm(self):
+        """Build the Langchain LLM instance for this provider.
+
+        Returns
+        -------
+        object
+            Langchain LLM instance.
+
+        """
+        pass
+
+    def invoke(self, prompt: str, system_prompt: Optional[str] = None) -> str:
         """Invoke the LLM with a prompt.
 
+        Responses are served from an LRU cache for repeated prompts when
+        ``prompt_cache_size`` is set in the provider configuration.
+
         Parameters
         ----------
         prompt : str
             Input prompt text.
+        system_prompt : str, optional
+            Instructions sent as a separate system message. Keeping a
+            constant preamble here, rather than in ``prompt``, gives
+            providers a stable prefix for input caching.
+
+        Returns
+        -------
+        str
+            LLM response text.
+
+        """
+        llm_input = _llm_input(prompt, system_prompt)
+        if not self._prompt_cache_size:
+            return self._invoke(llm_input)
+
+        digest = hashlib.blake2b(prompt.encode(), digest_size=16)
+        if system_prompt is not None:
+            digest.update(b"\0" + system_prompt.encode())
+        key = (self.model, system_prompt is not None, digest.digest())
+        cached = self._prompt_cache.get(key)
+        if cached is not None:
+            self._prompt_cache.move_to_end(key)
+            return cached
+
+        response = self._invoke(llm_input)
+        self._prompt_cache[key] = response
+        if len(self._prompt_cache) > self._prompt_cache_size:
+            self._prompt_cache.popitem(last=False)
+        return response
+
+    @abstractmethod
+    def _invoke(self, prompt) -> str:
+        """Send a prompt to the LLM, bypassing the prompt cache.
+
+        Parameters
+        ----------
+        prompt : str or list
+            Input prompt text, or a list of messages.
 
         Returns
         -------
@@ -65,6 +231,117 @@ class BaseProvider(ABC):
         """
         pass
 
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Stream the LLM response to a prompt as it is generated.
+
+        Parameters
+        ----------
+        prompt : str
+            Input prompt text.
+
+        Yields
+        ------
+        str
+            Chunks of response text.
+
+        """
+        for chunk in self.get_llm().stream(prompt):
+            text = _response_text(chunk)
+            if text:
+                yield text
+
+    def batch_invoke(self, prompts: list[str], max_concurrency: Optional[int] = None) -> list[str]:
+        """Invoke the LLM with several independent prompts concurrently.
+
+        Parameters
+        ----------
+        prompts : list[str]
+            Input prompt texts.
+        max_concurrency : int, optional
+            Maximum number of requests in flight at once. No limit if not
+            provided.
+
+        Returns
+        -------
+        list[str]
+            LLM response texts, in the same order as the prompts.
+
+        """
+        responses = self.get_llm().batch(prompts, config={"max_concurrency": max_concurrency})
+        return [_response_text(response) for response in responses]
+
+    def map_reduce(
+        self,
+        prompts: list[str],
+        reduce_template: str,
+        max_concurrency: Optional[int] = None,
+    ) -> str:
+        """Answer independent prompts concurrently, then combine the answers.
+
+        The map prompts are sent in a single concurrent batch, so the whole
+        workflow costs two sequential round trips instead of one per prompt.
+
+        Parameters
+        ----------
+        prompts : list[str]
+            Independent map-step prompts, e.g. one per document chunk.
+        reduce_template : str
+            Prompt for the final step; ``{partials}`` is replaced with the
+            map-step answers separated by blank lines.
+        max_concurrency : int, optional
+            Maximum number of map-step requests in flight at once.
+
+        Returns
+        -------
+        str
+            Response text of the reduce step.
+
+        """
+        partials = self.batch_invoke(prompts, max_concurrency=max_concurrency)
+        return self.invoke(reduce_template.format(partials="\n\n".join(partials)))
+
+    async def ainvoke(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        """Invoke the LLM with a prompt without blocking the event loop.
+
+        Parameters
+        ----------
+        prompt : str
+            Input prompt text.
+        system_prompt : str, optional
+            Instructions sent as a separate system message.
+
+        Returns
+        -------
+        str
+            LLM response text.
+
+        """
+        response = await self.get_llm().ainvoke(_llm_input(prompt, system_prompt))
+        return _response_text(response)
+
+    async def abatch(self, prompts: list[str], max_concurrency: Optional[int] = None) -> list[str]:
+        """Invoke the LLM with several independent prompts concurrently.
+
+        Async counterpart of ``batch_invoke``, for callers that already run
+        an event loop and want to overlap provider calls with other work.
+
+        Parameters
+        ----------
+        prompts : list[str]
+            Input prompt texts.
+        max_concurrency : int, optional
+            Maximum number of requests in flight at once. No limit if not
+            provided.
+
+        Returns
+        -------
+        list[str]
+            LLM response texts, in the same order as the prompts.
+
+        """
+        responses = await self.get_llm().abatch(prompts, config={"max_concurrency": max_concurrency})
+        return [_response_text(response) for response in responses]
+
     def get_model_name(self) -> str:
         """Get the actual model name being used.
 
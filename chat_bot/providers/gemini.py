@@ -1,9 +1,11 @@
 """Google Gemini provider implementation."""
 
 from typing import Optional
-from langchain_google_genai import ChatGoogleGenerativeAI
 
-from chat_bot.providers.base import BaseProvider
+from chat_bot.config.settings import GeminiConfig
+from chat_bot.providers._cache import secret_digest
+from chat_bot.providers._limits import TokenBucket
+from chat_bot.providers.base import BaseProvider, _response_text
 
 
 class GeminiProvider(BaseProvider):
@@ -15,25 +17,45 @@ class GeminiProvider(BaseProvider):
     ----------
     api_key : str, optional
         Google Gemini API key.
+    requests_per_minute : int
+        Client-side request rate limit (0 disables).
 
     """
 
-    def __init__(self, config: dict, model: Optional[str] = None):
+    def __init__(self, config: dict | GeminiConfig, model: Optional[str] = None):
         """Initialize Gemini provider.
 
         Parameters
         ----------
-        config : dict
-            Configuration dict with 'api_key' and 'model'.
+        config : dict or GeminiConfig
+            Configuration with 'api_key', 'model', and optionally
+            'requests_per_minute' (default 60).
         model : str, optional
             Optional model name override.
 
         """
         super().__init__(config, model)
         self.api_key = config.get("api_key")
+        self.requests_per_minute = config.get("requests_per_minute", 60)
 
-    def get_llm(self):
-        """Get Gemini LLM instance.
+    def _llm_cache_key(self):
+        """Get the shared cache key, using a digest instead of the API key.
+
+        Returns
+        -------
+        tuple
+            Provider name, model, API key digest, and rate limit.
+
+        """
+        return (
+            "gemini",
+            self.model,
+            secret_digest(self.api_key) if self.api_key else None,
+            self.requests_per_minute,
+        )
+
+    def _build_llm(self):
+        """Build Gemini LLM instance.
 
         Returns
         -------
@@ -46,22 +68,28 @@ class GeminiProvider(BaseProvider):
             If API key is missing.
 
         """
-        if self._llm is None:
-            if not self.api_key:
-                raise ValueError("Gemini API key is required")
-            self._llm = ChatGoogleGenerativeAI(
-                model=self.model,
-                google_api_key=self.api_key,
-            )
-        return self._llm
-
-    def invoke(self, prompt: str) -> str:
+        if not self.api_key:
+            raise ValueError("Gemini API key is required")
+
+        # Imported here so runs that only use Ollama skip the Google SDK import
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        rate_limiter = (
+            TokenBucket(self.requests_per_minute) if self.requests_per_minute > 0 else None
+        )
+        return ChatGoogleGenerativeAI(
+            model=self.model,
+            google_api_key=self.api_key,
+            rate_limiter=rate_limiter,
+        )
+
+    def _invoke(self, prompt) -> str:
         """Invoke Gemini LLM with a prompt.
 
         Parameters
         ----------
-        prompt : str
-            Input prompt text.
+        prompt : str or list
+            Input prompt text, or a list of messages.
 
         Returns
         -------
@@ -70,11 +98,9 @@ class GeminiProvider(BaseProvider):
 
         """
         llm = self.get_llm()
-        response = llm.invoke(prompt)
-        # ChatGoogleGenerativeAI returns a message object, extract content
-        if hasattr(response, "content"):
-            return response.content["text"]
-        return str(response)
+        # ChatGoogleGenerativeAI returns a message whose content is a string
+        # or a list of content parts
+        return _response_text(llm.invoke(prompt))
 
     def validate_config(self) -> bool:
         """Validate Gemini configuration.
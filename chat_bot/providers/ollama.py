@@ -1,12 +1,64 @@
 """Ollama provider implementation."""
 
 from typing import Optional
+import difflib
 import json
+import re
+import time
 from urllib.request import urlopen, Request
 from urllib.error import URLError, HTTPError
-from langchain_ollama import ChatOllama
+import httpx
 
-from chat_bot.providers.base import BaseProvider
+from chat_bot.config.settings import OllamaConfig
+from chat_bot.providers.base import BaseProvider, _response_text
+
+# Generation can take minutes on local hardware, but connecting should not
+OLLAMA_TIMEOUT = httpx.Timeout(300.0, connect=10.0)
+
+# Keep-alive pool sized for concurrent batch requests. HTTP/2 is not enabled:
+# Ollama serves plain HTTP/1.1, and httpx only negotiates HTTP/2 over TLS
+OLLAMA_POOL_LIMITS = httpx.Limits(
+    max_keepalive_connections=40,
+    max_connections=100,
+    keepalive_expiry=30.0,
+)
+
+# Retries for failed connection attempts (not for failed requests)
+OLLAMA_CONNECT_RETRIES = 3
+
+# Seconds a fetched list of available models stays valid
+MODELS_CACHE_TTL = 60.0
+
+# Multipliers for the suffixes of Ollama's parameter_size, e.g. "3.2B"
+_PARAMETER_SUFFIXES = {"K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}
+
+
+def _model_rank(details: dict) -> tuple[float, int]:
+    """Rank a model by parameter count, then quantization precision.
+
+    Parameters
+    ----------
+    details : dict
+        The "details" entry of a model from Ollama's /api/tags response.
+
+    Returns
+    -------
+    tuple[float, int]
+        Parameter count and bits per weight; 0 where unknown.
+
+    """
+    size = str(details.get("parameter_size") or "").strip().upper()
+    try:
+        if size[-1:] in _PARAMETER_SUFFIXES:
+            parameters = float(size[:-1]) * _PARAMETER_SUFFIXES[size[-1]]
+        else:
+            parameters = float(size or 0)
+    except ValueError:
+        parameters = 0.0
+
+    # "Q4_K_M" -> 4, "Q8_0" -> 8, "F16"/"BF16" -> 16
+    bits = re.search(r"\d+", str(details.get("quantization_level") or ""))
+    return parameters, int(bits.group()) if bits else 0
 
 
 class OllamaProvider(BaseProvider):
@@ -21,16 +73,25 @@ class OllamaProvider(BaseProvider):
         Base URL for the Ollama API.
     _matched_model : str, optional
         Matched model name from available models.
+    _models_cache : tuple[float, list[str]], optional
+        Fetch time and names of the available models, reused for
+        ``MODELS_CACHE_TTL`` seconds.
+    _model_ranks : dict[str, tuple[float, int]]
+        Parameter count and quantization bits of each fetched model.
+    _models_index : tuple[list[str], dict[str, list[str]]], optional
+        Model list and the same names grouped by base name (the part before
+        the ':' tag), best ranked first, rebuilt whenever a new list is
+        fetched.
 
     """
 
-    def __init__(self, config: dict, model: Optional[str] = None):
+    def __init__(self, config: dict | OllamaConfig, model: Optional[str] = None):
         """Initialize Ollama provider.
 
         Parameters
         ----------
-        config : dict
-            Configuration dict with 'base_url' and 'model'.
+        config : dict or OllamaConfig
+            Configuration with 'base_url' and 'model'.
         model : str, optional
             Optional model name override.
 
@@ -38,33 +99,71 @@ class OllamaProvider(BaseProvider):
         super().__init__(config, model)
         self.base_url = config.get("base_url", "http://localhost:11434")
         self._matched_model = None
+        self._models_cache: Optional[tuple[float, list[str]]] = None
+        self._model_ranks: dict[str, tuple[float, int]] = {}
+        self._models_index: Optional[tuple[list[str], dict[str, list[str]]]] = None
 
     def _get_available_models(self) -> list[str]:
         """Get list of available Ollama models.
 
+        Successful results are cached for ``MODELS_CACHE_TTL`` seconds;
+        failures are not, so a server that comes up later is picked up.
+
         Returns
         -------
         list[str]
             List of model names available in Ollama.
 
         """
+        now = time.monotonic()
+        if self._models_cache is not None and now - self._models_cache[0] < MODELS_CACHE_TTL:
+            return self._models_cache[1]
+
         try:
             url = f"{self.base_url}/api/tags"
             request = Request(url)
             with urlopen(request, timeout=5) as response:
-                data = json.loads(response.read().decode())
-                return [model["name"] for model in data.get("models", [])]
+                data = json.load(response)
+                models = [model["name"] for model in data.get("models", [])]
+                self._model_ranks = {
+                    model["name"]: _model_rank(model.get("details") or {})
+                    for model in data.get("models", [])
+                }
+            self._models_cache = (now, models)
+            return models
         except (URLError, HTTPError, json.JSONDecodeError, TimeoutError):
             # If we can't fetch models, return empty list
             # This allows the code to still work if Ollama is not running
             return []
 
+    def _get_models_by_base(self) -> dict[str, list[str]]:
+        """Get the available models grouped by base name.
+
+        Returns
+        -------
+        dict[str, list[str]]
+            Full model names keyed by the part before the ':' tag, largest
+            and least quantized first; ties keep Ollama's order.
+
+        """
+        models = self._get_available_models()
+        if self._models_index is None or self._models_index[0] is not models:
+            models_by_base: dict[str, list[str]] = {}
+            for name in models:
+                models_by_base.setdefault(name.partition(":")[0], []).append(name)
+            for names in models_by_base.values():
+                names.sort(key=lambda name: self._model_ranks.get(name, (0.0, 0)), reverse=True)
+            self._models_index = (models, models_by_base)
+        return self._models_index[1]
+
     def _match_model(self, requested_model: str) -> str:
         """Match requested model name to available models.
 
         If the requested model includes a tag (e.g., "llama3.2:3b"), it will
         match exactly. If it doesn't include a tag (e.g., "llama3.2"), it will
-        match any model with that base name (e.g., "llama3.2:3b", "llama3.2:1b").
+        match the model with that base name that has the most parameters,
+        then the highest quantization precision (e.g., "llama3.2:3b" over
+        "llama3.2:1b"). Errors suggest the closest available name.
 
         Parameters
         ----------
@@ -81,63 +180,108 @@ class OllamaProvider(BaseProvider):
         ValueError
             If no matching model is found.
         """
-        available_models = self._get_available_models()
+        models_by_base = self._get_models_by_base()
 
         # If no models available, return the requested model as-is
         # (will fail later if it doesn't exist, but allows graceful degradation)
-        if not available_models:
+        if not models_by_base:
             return requested_model
 
+        # All candidates share the requested base name
+        base, sep, _ = requested_model.partition(":")
+        matching_models = models_by_base.get(base, [])
+        available_models = self._models_index[0]
+
         # Exact match first
-        if requested_model in available_models:
+        if requested_model in matching_models:
             return requested_model
 
         # If requested model has a tag (contains ':'), require exact match
-        if ":" in requested_model:
+        if sep:
             raise ValueError(
                 f"Model '{requested_model}' not found. Available models: {', '.join(available_models)}"
+                + self._suggest_model(requested_model)
             )
 
-        # If no tag, try prefix matching
-        # Match models that start with "requested_model:"
-        prefix = f"{requested_model}:"
-        matching_models = [m for m in available_models if m.startswith(prefix)]
-
+        # If no tag, any tagged model with this base name matches
         if not matching_models:
             raise ValueError(
                 f"No model matching '{requested_model}' found. Available models: {', '.join(available_models)}"
+                + self._suggest_model(requested_model)
             )
 
-        # If multiple matches, return the first one (could be made configurable)
+        # Candidates are ranked best first
         return matching_models[0]
 
-    def get_llm(self):
-        """Get Ollama LLM instance.
+    def _suggest_model(self, requested_model: str) -> str:
+        """Suggest the available model name closest to a requested one.
+
+        Parameters
+        ----------
+        requested_model : str
+            The model name requested by the user.
 
         Returns
         -------
-        object
-            Ollama LLM instance from langchain_ollama.
+        str
+            A " Did you mean ...?" hint, or an empty string if no name is
+            similar enough.
 
         """
-        if self._llm is None:
-            # Match the model to available models
-            if self._matched_model is None:
-                self._matched_model = self._match_model(self.model)
+        models, models_by_base = self._models_index
+        matches = difflib.get_close_matches(requested_model, [*models_by_base, *models], n=1, cutoff=0.7)
+        return f" Did you mean '{matches[0]}'?" if matches else ""
 
-            self._llm = ChatOllama(
-                model=self._matched_model,
-                base_url=self.base_url,
-            )
-        return self._llm
+    def _llm_cache_key(self):
+        """Get the shared cache key for this provider's LLM.
+
+        Returns
+        -------
+        tuple
+            Provider name, base URL, and requested model.
+
+        """
+        return ("ollama", self.base_url, self.model)
+
+    def _build_llm(self):
+        """Build Ollama LLM instance.
 
-    def invoke(self, prompt: str) -> str:
+        Returns
+        -------
+        object
+            Ollama LLM instance from langchain_ollama.
+
+        """
+        # Match the model to available models
+        if self._matched_model is None:
+            self._matched_model = self._match_model(self.model)
+
+        # Imported here so runs that only use Gemini skip the Ollama SDK import
+        from langchain_ollama import ChatOllama
+
+        return ChatOllama(
+            model=self._matched_model,
+            base_url=self.base_url,
+            client_kwargs={"timeout": OLLAMA_TIMEOUT},
+            sync_client_kwargs={
+                "transport": httpx.HTTPTransport(
+                    retries=OLLAMA_CONNECT_RETRIES, limits=OLLAMA_POOL_LIMITS
+                ),
+            },
+            async_client_kwargs={
+                "transport": httpx.AsyncHTTPTransport(
+                    retries=OLLAMA_CONNECT_RETRIES, limits=OLLAMA_POOL_LIMITS
+                ),
+            },
+        )
+
+    def _invoke(self, prompt) -> str:
         """Invoke Ollama LLM with a prompt.
 
         Parameters
         ----------
-        prompt : str
-            Input prompt text.
+        prompt : str or list
+            Input prompt text, or a list of messages.
 
         Returns
         -------
@@ -146,7 +290,7 @@ class OllamaProvider(BaseProvider):
 
         """
         llm = self.get_llm()
-        return llm.invoke(prompt)
+        return _response_text(llm.invoke(prompt))
 
     def get_model_name(self) -> str:
         """Get the actual model name being used.
@@ -1,89 +1,116 @@
 """Shared pytest fixtures for Chat-Bot-Prototype tests."""
 
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 
 import pytest
+from click.testing import CliRunner
 
+import chat_bot.cli.main as cli_main
 from chat_bot.config.settings import Settings
+from chat_bot.providers._cache import clear_cached_llms, disable_llm_cache
+from chat_bot.providers.gemini import GeminiProvider
 
 
-@pytest.fixture
+@pytest.fixture(autouse=True)
+def clear_shared_llms():
+    """Fixture that isolates tests from LLMs and responses cached by earlier tests."""
+    clear_cached_llms()
+    yield
+    clear_cached_llms()
+    disable_llm_cache()
+
+
+@pytest.fixture(scope="session")
 def mock_settings():
     """Fixture providing Settings instance with test configuration.
     
     Returns a Settings instance configured for testing with default
-    test values that can be overridden in individual tests.
+    test values. Settings are immutable, so one instance is shared by the
+    whole session; individual tests derive modified copies with
+    ``dataclasses.replace``.
     
     Returns
     -------
     Settings
         Settings instance with test configuration.
     """
-    settings = Settings()
-    # Override with test defaults
-    settings.ollama_base_url = "http://localhost:11434"
-    settings.ollama_model = "llama3.2"
-    settings.gemini_api_key = "test-api-key"
-    settings.gemini_model = "gemini-2.5-flash"
-    return settings
+    return Settings(
+        ollama_base_url="http://localhost:11434",
+        ollama_model="llama3.2",
+        gemini_api_key="test-api-key",
+        gemini_model="gemini-2.5-flash",
+    )
 
 
 @pytest.fixture
-def mock_ollama_llm():
-    """Fixture providing mock Ollama LLM instance.
+def gemini_provider():
+    """Fixture providing a GeminiProvider with test configuration.
     
-    Returns a MagicMock configured to behave like an Ollama LLM
-    with an invoke() method that returns a mock response.
+    A fresh provider is built per test, so tests may change its
+    attributes in place.
     
     Returns
     -------
-    MagicMock
-        Mock Ollama LLM instance.
+    GeminiProvider
+        Gemini provider for "gemini-2.5-flash" with a test API key.
     """
-    llm = MagicMock()
-    llm.invoke.return_value = "Mock Ollama response"
-    llm.model = "llama3.2:3b"
-    llm.base_url = "http://localhost:11434"
-    return llm
+    return GeminiProvider({"api_key": "test-api-key", "model": "gemini-2.5-flash"})
 
 
 @pytest.fixture
-def mock_gemini_llm():
-    """Fixture providing mock Gemini LLM instance.
+def chat_agent_mock():
+    """Fixture providing a MagicMock ChatAgent instance with common defaults.
     
-    Returns a MagicMock configured to behave like a Gemini LLM
-    with an invoke() method that returns a mock message object.
+    The mock reports the "llama3.2:3b" model and answers invoke() with
+    "Test response"; tests override only what they need. A fresh mock is
+    built per test so recorded calls never leak between tests.
     
     Returns
     -------
     MagicMock
-        Mock Gemini LLM instance.
+        Mock ChatAgent instance.
     """
-    llm = MagicMock()
-    # Gemini returns message objects with content attribute
-    mock_message = MagicMock()
-    mock_message.content = "Mock Gemini response"
-    llm.invoke.return_value = mock_message
-    llm.model = "gemini-2.5-flash"
-    return llm
+    agent = MagicMock()
+    agent.get_model_name.return_value = "llama3.2:3b"
+    agent.invoke.return_value = "Test response"
+    return agent
 
 
 @pytest.fixture
-def mock_agent():
-    """Fixture providing mock ChatAgent instance for CLI tests.
+def cli_mocks(monkeypatch, chat_agent_mock):
+    """Fixture replacing the CLI's ChatAgent and settings with mocks.
     
-    Returns a MagicMock configured to behave like a ChatAgent
-    with invoke() and get_model_name() methods.
+    ChatAgent returns ``chat_agent_mock`` and get_settings() returns a
+    MagicMock settings object. Output is left to CliRunner to capture.
     
     Returns
     -------
-    MagicMock
-        Mock ChatAgent instance.
+    SimpleNamespace
+        ``chat_agent`` (class mock), ``agent`` (instance mock),
+        ``get_settings`` and ``settings`` mocks.
     """
-    agent = MagicMock()
-    agent.invoke.return_value = "Mock agent response"
-    agent.get_model_name.return_value = "llama3.2:3b"
-    agent.provider_name = "ollama"
-    agent.model = "llama3.2:3b"
-    return agent
+    mocks = SimpleNamespace(
+        chat_agent=MagicMock(return_value=chat_agent_mock),
+        agent=chat_agent_mock,
+        get_settings=MagicMock(),
+    )
+    mocks.settings = mocks.get_settings.return_value
+    monkeypatch.setattr(cli_main, "ChatAgent", mocks.chat_agent)
+    monkeypatch.setattr(cli_main, "get_settings", mocks.get_settings)
+    return mocks
 
+
+@pytest.fixture(scope="session")
+def cli_runner():
+    """Fixture providing a Click CliRunner shared by the session.
+    
+    CliRunner keeps no state between invocations; each invoke() call
+    isolates its own input and output streams.
+    
+    Returns
+    -------
+    CliRunner
+        Runner for invoking CLI commands.
+    """
+    return CliRunner()
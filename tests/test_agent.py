@@ -1,250 +1,288 @@
 """Unit tests for ChatAgent class."""
 
+import asyncio
+import re
+import socket
+import threading
+from dataclasses import replace
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
+from urllib.error import URLError
 
 import pytest
+from langchain.messages import AIMessage, HumanMessage, RemoveMessage, ToolMessage
 
-from chat_bot.agent.agent import ChatAgent
+from chat_bot.agent.agent import (
+    PROVIDERS,
+    ChatAgent,
+    _mcp_server_reachable,
+    _message_chars,
+    create_trim_messages_middleware,
+)
+from chat_bot.config.settings import Settings
+from chat_bot.providers.ollama import OllamaProvider
 
+_UNKNOWN_PROVIDER_RE = re.compile("Unknown provider")
 
-@patch("chat_bot.agent.agent.OllamaProvider")
-@patch("chat_bot.agent.agent.create_agent")
-def test_agent_initialization_ollama(mock_create_agent, mock_ollama_provider, mock_settings):
-    """Test that ChatAgent initializes correctly with Ollama provider.
-    
-    Verifies that ChatAgent can be instantiated with the "ollama" provider
-    and that it correctly initializes the OllamaProvider and agent.
+
+def _mock_provider():
+    """Build a provider mock returning a mock LLM and a fixed model name."""
+    provider_instance = MagicMock()
+    provider_instance.get_llm.return_value = MagicMock()
+    provider_instance.get_model_name.return_value = "llama3.2:3b"
+    return provider_instance
+
+
+def _mock_provider_class():
+    """Build a provider class mock whose instances come from _mock_provider()."""
+    return MagicMock(return_value=_mock_provider())
+
+
+@pytest.fixture(autouse=True)
+def mock_providers(monkeypatch):
+    """Replace every registered provider class with a mock."""
+    providers = {name: _mock_provider_class() for name in PROVIDERS}
+    for name, provider_cls in providers.items():
+        monkeypatch.setitem(PROVIDERS, name, provider_cls)
+    return providers
+
+
+@pytest.fixture(autouse=True)
+def mock_create_agent(monkeypatch):
+    """Replace create_agent with a mock returning a mock Langchain agent."""
+    mock_create = MagicMock()
+    monkeypatch.setattr("chat_bot.agent.agent.create_agent", mock_create)
+    return mock_create
+
+
+@pytest.fixture(autouse=True)
+def mock_mcp_client(monkeypatch):
+    """Replace the MCP client class so tests never connect to a server."""
+    mock_client_cls = MagicMock()
+    monkeypatch.setattr("chat_bot.agent.agent.MultiServerMCPClient", mock_client_cls)
+    return mock_client_cls
+
+
+@pytest.fixture(autouse=True)
+def mock_mcp_reachable():
+    """Treat every MCP server as reachable so tests never open real sockets."""
+    with patch("chat_bot.agent.agent._mcp_server_reachable", return_value=True) as mock_reachable:
+        yield mock_reachable
+
+
+@pytest.fixture
+def ollama_agent():
+    """Fixture providing an Ollama ChatAgent built under the autouse mocks.
+
+    A fresh agent is built for each test, so tests can mutate it freely; its
+    background event loop is closed on teardown.
     """
-    # Setup mocks
-    mock_provider_instance = MagicMock()
-    mock_provider_instance.get_llm.return_value = MagicMock()
-    mock_ollama_provider.return_value = mock_provider_instance
-    mock_agent_instance = MagicMock()
-    mock_create_agent.return_value = mock_agent_instance
-    
-    # Create agent
-    agent = ChatAgent(provider="ollama", settings=mock_settings)
-    
-    # Verify initialization
-    assert agent.provider_name == "ollama"
-    assert agent.settings == mock_settings
-    mock_ollama_provider.assert_called_once()
-    mock_create_agent.assert_called_once()
+    agent = ChatAgent(provider="ollama", settings=Settings(mcp_url=None))
+    yield agent
+    agent.close()
 
 
-@patch("chat_bot.agent.agent.GeminiProvider")
-@patch("chat_bot.agent.agent.create_agent")
-def test_agent_initialization_gemini(mock_create_agent, mock_gemini_provider, mock_settings):
-    """Test that ChatAgent initializes correctly with Gemini provider.
-    
-    Verifies that ChatAgent can be instantiated with the "gemini" provider
-    and that it correctly initializes the GeminiProvider and agent.
+@pytest.fixture
+def make_agent():
+    """Fixture providing a ChatAgent factory for tests needing custom settings.
+
+    Every agent built through the factory has its background event loop
+    closed on teardown.
     """
-    # Setup mocks
-    mock_provider_instance = MagicMock()
-    mock_provider_instance.get_llm.return_value = MagicMock()
-    mock_gemini_provider.return_value = mock_provider_instance
-    mock_agent_instance = MagicMock()
-    mock_create_agent.return_value = mock_agent_instance
+    agents = []
+
+    def _make_agent(**kwargs):
+        agent = ChatAgent(**kwargs)
+        agents.append(agent)
+        return agent
+
+    yield _make_agent
+    for agent in agents:
+        agent.close()
+
+
+@pytest.mark.parametrize("provider", ["ollama", "gemini"])
+def test_agent_initialization(provider, mock_create_agent, mock_providers, mock_settings, make_agent):
+    """Test that ChatAgent initializes correctly with each provider.
     
-    # Create agent
-    agent = ChatAgent(provider="gemini", settings=mock_settings)
+    Verifies that ChatAgent can be instantiated with the "ollama" and
+    "gemini" providers and that it initializes the registered provider
+    class and agent.
+    """
+    agent = make_agent(provider=provider, settings=mock_settings)
     
     # Verify initialization
-    assert agent.provider_name == "gemini"
+    assert agent.provider_name == provider
     assert agent.settings == mock_settings
-    mock_gemini_provider.assert_called_once()
+    mock_providers[provider].assert_called_once()
     mock_create_agent.assert_called_once()
 
 
-def test_agent_initialization_unknown_provider(mock_settings):
+@pytest.mark.parametrize("provider", ["unknown", "openai", ""])
+def test_agent_initialization_unknown_provider(provider, mock_settings):
     """Test that ChatAgent raises ValueError for unknown provider.
     
     Verifies that attempting to create a ChatAgent with an unknown provider
     raises a ValueError with an appropriate error message.
     """
-    with pytest.raises(ValueError, match="Unknown provider"):
-        ChatAgent(provider="unknown", settings=mock_settings)
+    with pytest.raises(ValueError, match=_UNKNOWN_PROVIDER_RE):
+        ChatAgent(provider=provider, settings=mock_settings)
 
 
-@patch("chat_bot.agent.agent.OllamaProvider")
-@patch("chat_bot.agent.agent.create_agent")
-def test_agent_invoke(mock_create_agent, mock_ollama_provider, mock_settings):
+def test_agent_invoke(ollama_agent):
     """Test that agent.invoke() returns response from mocked LLM.
     
     Verifies that invoking the agent with a message returns the expected
     response from the mocked agent.
     """
-    # Setup mocks
-    mock_provider_instance = MagicMock()
-    mock_provider_instance.get_llm.return_value = MagicMock()
-    mock_ollama_provider.return_value = mock_provider_instance
-    
-    mock_agent_instance = MagicMock()
-    mock_message = MagicMock()
-    mock_message.content = "Test response"
-    mock_agent_instance.invoke.return_value = {"messages": [mock_message]}
-    mock_create_agent.return_value = mock_agent_instance
+    mock_message = SimpleNamespace(content="Test response")
+    ollama_agent.agent.ainvoke = AsyncMock(return_value={"messages": [mock_message]})
     
-    # Create agent and invoke
-    agent = ChatAgent(provider="ollama", settings=mock_settings)
-    response = agent.invoke("Test message")
+    response = ollama_agent.invoke("Test message")
     
     # Verify response
     assert response == "Test response"
-    mock_agent_instance.invoke.assert_called_once()
+    ollama_agent.agent.ainvoke.assert_called_once()
 
 
-@patch("chat_bot.agent.agent.OllamaProvider")
-@patch("chat_bot.agent.agent.create_agent")
-def test_agent_add_tool(mock_create_agent, mock_ollama_provider, mock_settings):
-    """Test that tool addition triggers agent reinitialization.
+def test_agent_stream(ollama_agent):
+    """Test that agent.stream() yields model chunks as they arrive.
     
-    Verifies that adding a tool to the agent causes the agent to be
-    reinitialized with the new tool list.
+    Verifies that only chat model stream events are forwarded and that
+    empty chunks (e.g. tool-call deltas) are skipped.
     """
-    # Setup mocks
-    mock_provider_instance = MagicMock()
-    mock_provider_instance.get_llm.return_value = MagicMock()
-    mock_ollama_provider.return_value = mock_provider_instance
+    async def astream_events(*args, **kwargs):
+        yield {"event": "on_chain_start", "data": {}}
+        for content in ["Hello", "", [{"type": "text", "text": " world"}]]:
+            chunk = SimpleNamespace(content=content)
+            yield {"event": "on_chat_model_stream", "data": {"chunk": chunk}}
     
-    mock_agent_instance = MagicMock()
-    mock_create_agent.return_value = mock_agent_instance
+    ollama_agent.agent.astream_events = astream_events
     
-    # Ensure MCP tools are not loaded for this test
-    mock_settings.mcp_url = None
+    chunks = list(ollama_agent.stream("Test message"))
     
-    # Create agent
-    agent = ChatAgent(provider="ollama", settings=mock_settings)
+    # Verify chunks
+    assert chunks == ["Hello", " world"]
+
+
+def test_agent_add_tool(mock_create_agent, ollama_agent):
+    """Test that tool addition triggers a lazy agent reinitialization.
     
-    # Reset call count after initial creation
+    Verifies that adding tools marks the agent for rebuilding and that it
+    is reinitialized once, on the next invocation.
+    """
+    # Only count rebuilds after the fixture built the agent
     mock_create_agent.reset_mock()
+    mock_agent_instance = MagicMock()
+    mock_message = SimpleNamespace(content="Test response")
+    mock_agent_instance.ainvoke = AsyncMock(return_value={"messages": [mock_message]})
+    mock_create_agent.return_value = mock_agent_instance
     
-    # Add tool
+    # Add tools
     mock_tool = MagicMock()
-    agent.add_tool(mock_tool)
-    
-    # Verify agent was reinitialized
-    assert len(agent.tools) == 1
-    assert agent.tools[0] == mock_tool
+    ollama_agent.add_tool(mock_tool)
+    other_tools = [MagicMock(), MagicMock()]
+    ollama_agent.add_tools(other_tools)
+    
+    # Verify agent is only rebuilt when invoked
+    assert ollama_agent.tools == [mock_tool, *other_tools]
+    mock_create_agent.assert_not_called()
+    ollama_agent.invoke("Test message")
     mock_create_agent.assert_called_once()
+    assert mock_create_agent.call_args.kwargs["tools"] == ollama_agent.tools
 
 
-@patch("chat_bot.agent.agent.OllamaProvider")
-@patch("chat_bot.agent.agent.create_agent")
-def test_agent_get_model_name(mock_create_agent, mock_ollama_provider, mock_settings):
+def test_agent_get_model_name(ollama_agent):
     """Test that get_model_name() returns correct model name.
     
     Verifies that get_model_name() correctly returns the model name
     from the provider.
     """
-    # Setup mocks
-    mock_provider_instance = MagicMock()
-    mock_provider_instance.get_llm.return_value = MagicMock()
-    mock_provider_instance.get_model_name.return_value = "llama3.2:3b"
-    mock_ollama_provider.return_value = mock_provider_instance
-    
-    mock_agent_instance = MagicMock()
-    mock_create_agent.return_value = mock_agent_instance
-    
-    # Create agent and get model name
-    agent = ChatAgent(provider="ollama", settings=mock_settings)
-    model_name = agent.get_model_name()
+    model_name = ollama_agent.get_model_name()
     
     # Verify model name
     assert model_name == "llama3.2:3b"
-    mock_provider_instance.get_model_name.assert_called_once()
+    ollama_agent.provider.get_model_name.assert_called_once()
 
 
-@patch("chat_bot.agent.agent.OllamaProvider")
-@patch("chat_bot.agent.agent.create_agent")
-def test_agent_clear_history(mock_create_agent, mock_ollama_provider, mock_settings):
-    """Test that clear_history() method exists (no-op implementation).
+def test_agent_clear_history(mock_create_agent, ollama_agent):
+    """Test that clear_history() starts a new conversation thread.
     
-    Verifies that the clear_history() method exists and can be called
-    without raising an exception. The method is currently a no-op.
+    Verifies that clear_history() switches to a new thread_id, deletes the
+    old thread from the checkpointer, drops cached responses, and does not
+    rebuild the agent.
     """
-    # Setup mocks
-    mock_provider_instance = MagicMock()
-    mock_provider_instance.get_llm.return_value = MagicMock()
-    mock_ollama_provider.return_value = mock_provider_instance
-    
-    mock_agent_instance = MagicMock()
-    mock_create_agent.return_value = mock_agent_instance
-    
-    # Create agent and call clear_history
-    agent = ChatAgent(provider="ollama", settings=mock_settings)
-    
-    # Should not raise an exception
-    agent.clear_history()
-
-
-@patch("chat_bot.agent.agent.OllamaProvider")
-@patch("chat_bot.agent.agent.create_agent")
-@patch("chat_bot.agent.agent.MultiServerMCPClient")
-def test_agent_loads_mcp_tools_success(mock_mcp_client, mock_create_agent, mock_ollama_provider, mock_settings):
-    """Test that ChatAgent successfully loads MCP tools when MCP_URL is configured.
-    
-    Verifies that when MCP_URL is set, the agent connects to the MCP server,
-    loads tools, and makes them available to the agent.
+    mock_create_agent.reset_mock()
+    old_thread_id = ollama_agent.thread_id
+    ollama_agent._response_cache[("ollama", "llama3.2:3b", old_thread_id, b"")] = "Cached"
+
+    with patch.object(ollama_agent._checkpointer, "delete_thread") as mock_delete_thread:
+        ollama_agent.clear_history()
+
+    # Verify the conversation moved to a new thread
+    assert ollama_agent.thread_id != old_thread_id
+    mock_delete_thread.assert_called_once_with(old_thread_id)
+    assert not ollama_agent._response_cache
+    mock_create_agent.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    ("mcp_url", "result", "expected_tools", "log_message"),
+    [
+        ("http://localhost:8000/mcp", ["mcp_tool_1", "mcp_tool_2"], ["mcp_tool_1", "mcp_tool_2"], ""),
+        ("http://localhost:8000/mcp", asyncio.TimeoutError(), [], "timeout after 2.5 seconds"),
+        ("http://localhost:8000/mcp", ConnectionError("Connection refused"), [], "connection error"),
+        ("not-a-valid-url", ValueError("Invalid URL"), [], "invalid URL"),
+    ],
+    ids=["success", "timeout", "connection_error", "invalid_url"],
+)
+def test_agent_loads_mcp_tools(
+    mcp_url, result, expected_tools, log_message,
+    mock_mcp_client, mock_create_agent, mock_settings, caplog, make_agent,
+):
+    """Test that ChatAgent loads MCP tools or handles failures gracefully.
+    
+    Verifies that when MCP_URL is set, the agent loads the server's tools,
+    and that on a timeout, connection error, or invalid URL it initializes
+    successfully without MCP tools and logs an error.
     """
-    # Setup mocks
-    mock_provider_instance = MagicMock()
-    mock_provider_instance.get_llm.return_value = MagicMock()
-    mock_ollama_provider.return_value = mock_provider_instance
-    
-    mock_agent_instance = MagicMock()
-    mock_create_agent.return_value = mock_agent_instance
-    
-    # Setup MCP client mock
+    # Setup MCP client mock to return tools or raise the given error
     mock_client_instance = MagicMock()
-    mock_tool1 = MagicMock()
-    mock_tool1.name = "mcp_tool_1"
-    mock_tool2 = MagicMock()
-    mock_tool2.name = "mcp_tool_2"
-    mock_get_tools = AsyncMock(return_value=[mock_tool1, mock_tool2])
-    mock_client_instance.get_tools = mock_get_tools
+    if isinstance(result, Exception):
+        mock_client_instance.get_tools = AsyncMock(side_effect=result)
+    else:
+        mock_tools = [SimpleNamespace(name=name) for name in result]
+        mock_client_instance.get_tools = AsyncMock(return_value=mock_tools)
     mock_mcp_client.return_value = mock_client_instance
     
-    # Configure settings with MCP_URL
-    mock_settings.mcp_url = "http://localhost:8000/mcp"
+    mock_settings = replace(mock_settings, mcp_url=mcp_url, mcp_timeout=2.5)
     
-    # Create agent
-    agent = ChatAgent(provider="ollama", settings=mock_settings)
+    # Create agent (should handle failures gracefully)
+    with caplog.at_level("ERROR", logger="chat_bot.agent.agent"):
+        agent = make_agent(provider="ollama", settings=mock_settings)
     
-    # Verify MCP client was created
+    # Verify tools were loaded and merged, or skipped with an error logged
     mock_mcp_client.assert_called_once()
-    
-    # Verify tools were loaded and merged
-    assert len(agent.tools) == 2
-    assert agent.tools[0].name == "mcp_tool_1"
-    assert agent.tools[1].name == "mcp_tool_2"
-    
-    # Verify agent was initialized with tools
+    assert agent.provider_name == "ollama"
+    assert [tool.name for tool in agent.tools] == expected_tools
+    assert log_message in caplog.text
     mock_create_agent.assert_called_once()
 
 
-@patch("chat_bot.agent.agent.OllamaProvider")
-@patch("chat_bot.agent.agent.create_agent")
-def test_agent_backward_compatibility_no_mcp_url(mock_create_agent, mock_ollama_provider, mock_settings):
+def test_agent_backward_compatibility_no_mcp_url(mock_create_agent, mock_settings, make_agent):
     """Test that ChatAgent works normally when MCP_URL is not set (backward compatibility).
     
     Verifies that the agent initializes successfully without MCP tools when
     MCP_URL is not configured, maintaining backward compatibility.
     """
-    # Setup mocks
-    mock_provider_instance = MagicMock()
-    mock_provider_instance.get_llm.return_value = MagicMock()
-    mock_ollama_provider.return_value = mock_provider_instance
-    
     mock_agent_instance = MagicMock()
     mock_create_agent.return_value = mock_agent_instance
     
     # Configure settings without MCP_URL
-    mock_settings.mcp_url = None
+    mock_settings = replace(mock_settings, mcp_url=None)
     
     # Create agent
-    agent = ChatAgent(provider="ollama", settings=mock_settings)
+    agent = make_agent(provider="ollama", settings=mock_settings)
     
     # Verify agent initialized successfully
     assert agent.provider_name == "ollama"
@@ -253,149 +291,68 @@ def test_agent_backward_compatibility_no_mcp_url(mock_create_agent, mock_ollama_
     mock_create_agent.assert_called_once()
 
 
-@patch("chat_bot.agent.agent.OllamaProvider")
-@patch("chat_bot.agent.agent.create_agent")
-@patch("chat_bot.agent.agent.MultiServerMCPClient")
-def test_agent_mcp_connection_timeout(mock_mcp_client, mock_create_agent, mock_ollama_provider, mock_settings):
-    """Test that ChatAgent handles MCP connection timeout gracefully.
-    
-    Verifies that when MCP connection times out, the agent initializes
-    successfully without MCP tools and logs an error.
+def test_agent_mcp_server_unreachable(mock_mcp_client, mock_create_agent, mock_settings, mock_mcp_reachable, make_agent):
+    """Test that ChatAgent skips the MCP handshake when the server is down.
+
+    Verifies that when the TCP preflight fails, the MCP client is never
+    created and the agent initializes without MCP tools.
     """
-    import asyncio
-    
-    # Setup mocks
-    mock_provider_instance = MagicMock()
-    mock_provider_instance.get_llm.return_value = MagicMock()
-    mock_ollama_provider.return_value = mock_provider_instance
-    
-    mock_agent_instance = MagicMock()
-    mock_create_agent.return_value = mock_agent_instance
-    
-    # Setup MCP client mock to raise TimeoutError
-    mock_client_instance = MagicMock()
-    async def slow_get_tools():
-        await asyncio.sleep(10)  # Longer than 5 second timeout
-        return []
-    mock_client_instance.get_tools = slow_get_tools
-    mock_mcp_client.return_value = mock_client_instance
-    
+    mock_create_agent.return_value = MagicMock()
+    mock_mcp_reachable.return_value = False
+
     # Configure settings with MCP_URL
-    mock_settings.mcp_url = "http://localhost:8000/mcp"
-    
-    # Create agent (should handle timeout gracefully)
-    agent = ChatAgent(provider="ollama", settings=mock_settings)
-    
-    # Verify agent initialized successfully without MCP tools
-    assert agent.provider_name == "ollama"
-    assert agent.tools == []
-    mock_create_agent.assert_called_once()
+    mock_settings = replace(mock_settings, mcp_url="http://localhost:8000/mcp")
 
+    # Create agent
+    agent = make_agent(provider="ollama", settings=mock_settings)
 
-@patch("chat_bot.agent.agent.OllamaProvider")
-@patch("chat_bot.agent.agent.create_agent")
-@patch("chat_bot.agent.agent.MultiServerMCPClient")
-def test_agent_mcp_connection_error(mock_mcp_client, mock_create_agent, mock_ollama_provider, mock_settings):
-    """Test that ChatAgent handles MCP connection errors gracefully.
-    
-    Verifies that when MCP connection fails, the agent initializes
-    successfully without MCP tools and logs an error.
-    """
-    # Setup mocks
-    mock_provider_instance = MagicMock()
-    mock_provider_instance.get_llm.return_value = MagicMock()
-    mock_ollama_provider.return_value = mock_provider_instance
-    
-    mock_agent_instance = MagicMock()
-    mock_create_agent.return_value = mock_agent_instance
-    
-    # Setup MCP client mock to raise ConnectionError
-    mock_client_instance = MagicMock()
-    mock_get_tools = AsyncMock(side_effect=ConnectionError("Connection refused"))
-    mock_client_instance.get_tools = mock_get_tools
-    mock_mcp_client.return_value = mock_client_instance
-    
-    # Configure settings with MCP_URL
-    mock_settings.mcp_url = "http://localhost:8000/mcp"
-    
-    # Create agent (should handle connection error gracefully)
-    agent = ChatAgent(provider="ollama", settings=mock_settings)
-    
-    # Verify agent initialized successfully without MCP tools
-    assert agent.provider_name == "ollama"
+    # Verify the handshake was skipped
+    mock_mcp_reachable.assert_called_once_with("http://localhost:8000/mcp")
+    mock_mcp_client.assert_not_called()
     assert agent.tools == []
     mock_create_agent.assert_called_once()
 
 
-@patch("chat_bot.agent.agent.OllamaProvider")
-@patch("chat_bot.agent.agent.create_agent")
-@patch("chat_bot.agent.agent.MultiServerMCPClient")
-def test_agent_mcp_invalid_url(mock_mcp_client, mock_create_agent, mock_ollama_provider, mock_settings):
-    """Test that ChatAgent handles invalid MCP_URL gracefully.
-    
-    Verifies that when MCP_URL is invalid, the agent initializes
-    successfully without MCP tools and logs an error.
+def test_mcp_server_reachable():
+    """Test that the MCP preflight detects listening and closed ports.
+
+    Verifies that _mcp_server_reachable() returns True while a local socket
+    is listening, False once it is closed, and True for URLs without a host.
     """
-    # Setup mocks
-    mock_provider_instance = MagicMock()
-    mock_provider_instance.get_llm.return_value = MagicMock()
-    mock_ollama_provider.return_value = mock_provider_instance
-    
-    mock_agent_instance = MagicMock()
-    mock_create_agent.return_value = mock_agent_instance
-    
-    # Setup MCP client mock to raise ValueError
-    mock_client_instance = MagicMock()
-    mock_get_tools = AsyncMock(side_effect=ValueError("Invalid URL"))
-    mock_client_instance.get_tools = mock_get_tools
-    mock_mcp_client.return_value = mock_client_instance
-    
-    # Configure settings with invalid MCP_URL
-    mock_settings.mcp_url = "not-a-valid-url"
-    
-    # Create agent (should handle invalid URL gracefully)
-    agent = ChatAgent(provider="ollama", settings=mock_settings)
-    
-    # Verify agent initialized successfully without MCP tools
-    assert agent.provider_name == "ollama"
-    assert agent.tools == []
-    mock_create_agent.assert_called_once()
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    port = server.getsockname()[1]
+    url = f"http://127.0.0.1:{port}/mcp"
 
+    assert _mcp_server_reachable(url) is True
+    server.close()
+    assert _mcp_server_reachable(url) is False
+    assert _mcp_server_reachable("not-a-valid-url") is True
 
-@patch("chat_bot.agent.agent.OllamaProvider")
-@patch("chat_bot.agent.agent.create_agent")
-@patch("chat_bot.agent.agent.MultiServerMCPClient")
-def test_agent_loads_multiple_mcp_tools(mock_mcp_client, mock_create_agent, mock_ollama_provider, mock_settings):
+
+def test_agent_loads_multiple_mcp_tools(mock_mcp_client, mock_create_agent, mock_settings, make_agent):
     """Test that ChatAgent loads multiple tools from MCP server.
     
     Verifies that when MCP server provides multiple tools, all of them
     are loaded and made available to the agent.
     """
-    # Setup mocks
-    mock_provider_instance = MagicMock()
-    mock_provider_instance.get_llm.return_value = MagicMock()
-    mock_ollama_provider.return_value = mock_provider_instance
-    
     mock_agent_instance = MagicMock()
     mock_create_agent.return_value = mock_agent_instance
     
     # Setup MCP client mock with multiple tools
     mock_client_instance = MagicMock()
-    mock_tools = []
-    for i in range(5):
-        mock_tool = MagicMock()
-        mock_tool.name = f"mcp_tool_{i}"
-        mock_tools.append(mock_tool)
+    mock_tools = [SimpleNamespace(name=f"mcp_tool_{i}") for i in range(5)]
     
     mock_get_tools = AsyncMock(return_value=mock_tools)
     mock_client_instance.get_tools = mock_get_tools
     mock_mcp_client.return_value = mock_client_instance
     
     # Configure settings with MCP_URL
-    mock_settings.mcp_url = "http://localhost:8000/mcp"
+    mock_settings = replace(mock_settings, mcp_url="http://localhost:8000/mcp")
     
     # Create agent
-    agent = ChatAgent(provider="ollama", settings=mock_settings)
+    agent = make_agent(provider="ollama", settings=mock_settings)
     
     # Verify all tools were loaded
     assert len(agent.tools) == 5
@@ -406,51 +363,368 @@ def test_agent_loads_multiple_mcp_tools(mock_mcp_client, mock_create_agent, mock
     mock_create_agent.assert_called_once()
 
 
-@patch("chat_bot.agent.agent.OllamaProvider")
-@patch("chat_bot.agent.agent.create_agent")
-@patch("chat_bot.agent.agent.MultiServerMCPClient")
-def test_agent_mcp_tool_precedence(mock_mcp_client, mock_create_agent, mock_ollama_provider, mock_settings):
+def test_agent_mcp_tool_precedence(mock_mcp_client, mock_create_agent, mock_settings, make_agent):
     """Test that MCP tools take precedence over existing tools with same name.
     
     Verifies that when an MCP tool has the same name as an existing tool,
     the MCP tool replaces the existing tool.
     """
-    from langchain_core.tools import Tool
-    
-    # Setup mocks
-    mock_provider_instance = MagicMock()
-    mock_provider_instance.get_llm.return_value = MagicMock()
-    mock_ollama_provider.return_value = mock_provider_instance
-    
     mock_agent_instance = MagicMock()
     mock_create_agent.return_value = mock_agent_instance
     
     # Setup MCP client mock
     mock_client_instance = MagicMock()
-    mock_mcp_tool = MagicMock()
-    mock_mcp_tool.name = "search"  # Same name as existing tool
+    mock_mcp_tool = SimpleNamespace(name="search")  # Same name as existing tool
     mock_get_tools = AsyncMock(return_value=[mock_mcp_tool])
     mock_client_instance.get_tools = mock_get_tools
     mock_mcp_client.return_value = mock_client_instance
     
     # Configure settings with MCP_URL
-    mock_settings.mcp_url = "http://localhost:8000/mcp"
+    mock_settings = replace(mock_settings, mcp_url="http://localhost:8000/mcp")
     
     # Create existing tool with same name
-    existing_tool = Tool(
+    existing_tool = SimpleNamespace(
         name="search",
         func=lambda x: f"Searching: {x}",
         description="Search tool"
     )
     
     # Create agent with existing tool
-    agent = ChatAgent(provider="ollama", settings=mock_settings, tools=[existing_tool])
+    agent = make_agent(provider="ollama", settings=mock_settings, tools=[existing_tool])
     
     # Verify MCP tool replaced existing tool
     assert len(agent.tools) == 1
     assert agent.tools[0].name == "search"
-    assert agent.tools[0] == mock_mcp_tool  # MCP tool is used
+    assert agent.tools[0] is mock_mcp_tool  # MCP tool is used
     
     # Verify agent was initialized with merged tools
     mock_create_agent.assert_called_once()
 
+
+def test_trim_messages_under_limit():
+    """Test that the trim middleware leaves short histories untouched.
+    
+    Verifies that no update is returned when the history is within both
+    the message limit and the token budget.
+    """
+    middleware = create_trim_messages_middleware(10, context_window_tokens=100)
+    messages = [HumanMessage("Hello", id="1"), AIMessage("Hi", id="2")]
+    
+    assert middleware.before_model({"messages": messages}, None) is None
+
+
+def test_trim_messages_middleware_cached():
+    """Test that trim middleware instances are reused per set of limits.
+
+    Verifies that identical limits return the same middleware object and
+    different limits build a new one.
+    """
+    middleware = create_trim_messages_middleware(10, context_window_tokens=100)
+
+    assert create_trim_messages_middleware(10, context_window_tokens=100) is middleware
+    assert create_trim_messages_middleware(12, context_window_tokens=100) is not middleware
+
+
+def test_trim_messages_token_budget():
+    """Test that the trim middleware evicts oldest messages over budget.
+    
+    Verifies that the first message and the latest messages are kept
+    when the history exceeds the token budget.
+    """
+    # Budget of 10 tokens is roughly 30 characters
+    middleware = create_trim_messages_middleware(10, context_window_tokens=10)
+    messages = [
+        HumanMessage("first", id="1"),
+        AIMessage("x" * 20, id="2"),
+        HumanMessage("y" * 10, id="3"),
+        AIMessage("z" * 10, id="4"),
+    ]
+    
+    result = middleware.before_model({"messages": messages}, None)
+    
+    # Only the evicted message is removed, by id
+    assert result["messages"] == [RemoveMessage(id="2")]
+
+
+def test_trim_messages_memory_limit():
+    """Test that the trim middleware keeps the first and latest messages.
+    
+    Verifies that by default messages beyond the memory limit are removed
+    by id, without rewriting the retained history.
+    """
+    middleware = create_trim_messages_middleware(2)
+    messages = [HumanMessage(str(i), id=str(i)) for i in range(5)]
+    
+    result = middleware.before_model({"messages": messages}, None)
+    
+    assert result["messages"] == [RemoveMessage(id="1"), RemoveMessage(id="2")]
+
+
+def test_trim_messages_hysteresis():
+    """Test that the trim middleware trims in chunks down to the low water mark.
+    
+    Verifies that nothing is trimmed until the limit is exceeded and that
+    trimming then keeps only the low water number of recent messages.
+    """
+    middleware = create_trim_messages_middleware(6, low_water=2)
+    messages = [HumanMessage(str(i), id=str(i)) for i in range(8)]
+    
+    # At the limit the history is left alone
+    assert middleware.before_model({"messages": messages[:6]}, None) is None
+    
+    # Over the limit, trim down to first message plus the last two
+    result = middleware.before_model({"messages": messages}, None)
+    assert result["messages"] == [RemoveMessage(id=str(i)) for i in range(1, 6)]
+
+
+def test_trim_messages_low_water_skips_orphan_tool_results():
+    """Test that trimming to the low water mark never starts on a tool result.
+    
+    Verifies that when the low water cut lands on a tool message whose
+    tool call was removed, that tool message is removed as well.
+    """
+    middleware = create_trim_messages_middleware(4, low_water=2)
+    messages = [
+        HumanMessage("Search", id="1"),
+        HumanMessage("Again", id="2"),
+        AIMessage("", tool_calls=[{"name": "search", "args": {}, "id": "call"}], id="3"),
+        ToolMessage("Result", tool_call_id="call", id="4"),
+        AIMessage("Found it", id="5"),
+    ]
+    
+    result = middleware.before_model({"messages": messages}, None)
+    
+    # Only the first message and the final answer remain
+    assert result["messages"] == [RemoveMessage(id=str(i)) for i in range(2, 5)]
+
+
+def test_trim_messages_truncates_tool_output():
+    """Test that oversized tool outputs are truncated in the middle.
+    
+    Verifies that long tool outputs keep their head and tail within the
+    limit, marker included, and that the message id is preserved.
+    """
+    middleware = create_trim_messages_middleware(10, tool_output_limit=27)
+    messages = [
+        HumanMessage("Search", id="1"),
+        ToolMessage("a" * 50 + "b" * 50, tool_call_id="call", id="2"),
+    ]
+    
+    result = middleware.before_model({"messages": messages}, None)
+    
+    # The truncated copy replaces the original message by id
+    (tool_message,) = result["messages"]
+    assert tool_message.id == "2"
+    assert tool_message.content == "aaaaa...[truncated]...bbbbb"
+    assert len(tool_message.content) == 27
+
+
+def test_trim_messages_truncated_output_stable():
+    """Test that already truncated tool outputs are left alone.
+    
+    Verifies that a second pass over a history whose tool output was
+    truncated returns no update, so the checkpoint is not rewritten on
+    every model call.
+    """
+    middleware = create_trim_messages_middleware(10, tool_output_limit=27)
+    messages = [
+        HumanMessage("Search", id="1"),
+        ToolMessage("a" * 50 + "b" * 50, tool_call_id="call", id="2"),
+    ]
+    
+    (tool_message,) = middleware.before_model({"messages": messages}, None)["messages"]
+    
+    assert middleware.before_model({"messages": [messages[0], tool_message]}, None) is None
+
+
+def test_message_chars():
+    """Test that message length counts text parts and tool calls.
+
+    Verifies that _message_chars() measures string content directly, sums
+    the text of structured content parts, and includes tool call names and
+    argument values.
+    """
+    assert _message_chars(HumanMessage("hello")) == 5
+    assert _message_chars(HumanMessage([{"type": "text", "text": "abc"}, "de", {"type": "image_url"}])) == 5
+
+    message = AIMessage("", tool_calls=[{"name": "search", "args": {"query": "cats"}, "id": "call"}])
+    assert _message_chars(message) == len("search") + len("cats")
+
+
+def test_agent_refresh_mcp_tools(mock_mcp_client, mock_create_agent, mock_settings, make_agent):
+    """Test that refresh_mcp_tools() reuses the existing MCP client.
+    
+    Verifies that refreshing tools does not create a new MCP client and
+    that refreshed tools replace the previously loaded ones.
+    """
+    mock_agent_instance = MagicMock()
+    mock_create_agent.return_value = mock_agent_instance
+    
+    # Setup MCP client mock returning an updated tool on refresh
+    mock_client_instance = MagicMock()
+    old_tool = SimpleNamespace(name="mcp_tool")
+    new_tool = SimpleNamespace(name="mcp_tool")
+    mock_client_instance.get_tools = AsyncMock(side_effect=[[old_tool], [new_tool]])
+    mock_mcp_client.return_value = mock_client_instance
+    
+    mock_settings = replace(mock_settings, mcp_url="http://localhost:8000/mcp")
+    
+    # Create agent and refresh tools
+    agent = make_agent(provider="ollama", settings=mock_settings)
+    tools = agent.refresh_mcp_tools()
+    
+    # Verify the client was reused and the tool replaced
+    mock_mcp_client.assert_called_once()
+    assert len(tools) == 1 and tools[0] is new_tool
+    assert agent.tools == tools
+
+
+def test_agent_mcp_unexpected_error_propagates(mock_mcp_client, mock_settings):
+    """Test that unexpected errors while loading MCP tools are not swallowed.
+    
+    Verifies that only connection-related failures are handled gracefully,
+    that programming errors propagate to the caller, and that the failed
+    agent's background loop thread is stopped.
+    """
+    # Setup MCP client mock to raise an unexpected error
+    mock_client_instance = MagicMock()
+    mock_client_instance.get_tools = AsyncMock(side_effect=TypeError("bad call"))
+    mock_mcp_client.return_value = mock_client_instance
+    
+    mock_settings = replace(mock_settings, mcp_url="http://localhost:8000/mcp")
+    
+    threads_before = set(threading.enumerate())
+    with pytest.raises(TypeError, match="bad call"):
+        ChatAgent(provider="ollama", settings=mock_settings)
+    assert set(threading.enumerate()) <= threads_before
+
+
+def test_agent_response_cache(mock_create_agent, mock_settings, make_agent):
+    """Test that repeated messages are served from the response cache.
+    
+    Verifies that a normalized repeat of a message skips the LLM call but
+    is still recorded in the conversation, that entries are scoped to the
+    conversation thread, and that the least recently used entry is evicted
+    when the cache is full.
+    """
+    mock_agent_instance = MagicMock()
+    mock_message = SimpleNamespace(content="Test response")
+    mock_agent_instance.ainvoke = AsyncMock(return_value={"messages": [mock_message]})
+    mock_agent_instance.aupdate_state = AsyncMock()
+    mock_create_agent.return_value = mock_agent_instance
+    
+    mock_settings = replace(mock_settings, response_cache_size=1)
+    agent = make_agent(provider="ollama", settings=mock_settings)
+    
+    # Repeat with different case and whitespace hits the cache
+    assert agent.invoke("What is Python?") == "Test response"
+    assert agent.invoke("  what is python?") == "Test response"
+    assert mock_agent_instance.ainvoke.call_count == 1
+    
+    # The cache hit is written to the conversation thread
+    config, update = mock_agent_instance.aupdate_state.call_args.args
+    assert config == {"configurable": {"thread_id": agent.thread_id}}
+    assert [m.content for m in update["messages"]] == ["  what is python?", "Test response"]
+    
+    # Another conversation thread does not share cached responses
+    agent.thread_id = "2"
+    agent.invoke("What is Python?")
+    assert mock_agent_instance.ainvoke.call_count == 2
+    
+    # A new message evicts the old entry from the single-slot cache
+    agent.invoke("Other message")
+    agent.invoke("What is Python?")
+    assert mock_agent_instance.ainvoke.call_count == 4
+
+
+def test_agent_batch(mock_create_agent, mock_settings, make_agent):
+    """Test that agent.batch() answers independent messages concurrently.
+    
+    Verifies that each message gets its own conversation thread, that the
+    concurrency limit is passed through, and that errors are returned
+    in place instead of failing the whole batch.
+    """
+    mock_message = SimpleNamespace(content="Answer 1")
+    error = ValueError("Test error")
+    mock_agent_instance = MagicMock()
+    mock_agent_instance.abatch = AsyncMock(return_value=[{"messages": [mock_message]}, error])
+    mock_create_agent.return_value = mock_agent_instance
+    
+    # Create agent and run a batch
+    agent = make_agent(provider="ollama", settings=mock_settings)
+    responses = agent.batch(["Question 1", "Question 2"], max_concurrency=2)
+    
+    # Verify responses and per-message configuration
+    assert responses == ["Answer 1", error]
+    inputs, configs = mock_agent_instance.abatch.call_args.args
+    assert [i["messages"][0]["content"] for i in inputs] == ["Question 1", "Question 2"]
+    thread_ids = {c["configurable"]["thread_id"] for c in configs}
+    assert len(thread_ids) == 2
+    assert all(c["max_concurrency"] == 2 for c in configs)
+
+
+@patch("chat_bot.agent.agent.enable_llm_cache")
+def test_agent_llm_cache_setting(mock_enable_llm_cache, mock_settings, make_agent):
+    """Test that the LLM response cache is only enabled when configured.
+
+    Verifies that ChatAgent installs the LLM cache when enable_llm_cache is
+    set and leaves it alone otherwise.
+    """
+    make_agent(provider="ollama", settings=mock_settings)
+    mock_enable_llm_cache.assert_not_called()
+
+    make_agent(provider="ollama", settings=replace(mock_settings, enable_llm_cache=True))
+    mock_enable_llm_cache.assert_called_once()
+
+
+def test_agent_close(mock_create_agent, mock_settings):
+    """Test that close() stops the background event loop.
+    
+    Verifies that invocations share one background loop thread and that
+    close() stops and closes it.
+    """
+    mock_agent_instance = MagicMock()
+    mock_message = SimpleNamespace(content="Test response")
+    mock_agent_instance.ainvoke = AsyncMock(return_value={"messages": [mock_message]})
+    mock_create_agent.return_value = mock_agent_instance
+    
+    # Invoke twice on the same background loop
+    agent = ChatAgent(provider="ollama", settings=mock_settings)
+    agent.invoke("First message")
+    loop, thread = agent._loop, agent._loop_thread
+    agent.invoke("Second message")
+    assert agent._loop is loop
+    
+    # Close stops the loop thread
+    agent.close()
+    assert not thread.is_alive()
+    assert loop.is_closed()
+    assert agent._loop is None
+
+
+def test_agent_llm_not_shared_between_agents(monkeypatch, mock_create_agent, mock_settings):
+    """Test that agents built in sequence each get their own LLM.
+
+    Verifies that a ChatAgent built after another one was closed does not
+    reuse its LLM, whose async client is bound to the closed event loop,
+    and that neither agent's LLM is put in the process-wide cache.
+    """
+    monkeypatch.setitem(PROVIDERS, "ollama", OllamaProvider)
+    monkeypatch.setattr("chat_bot.providers.ollama.urlopen", MagicMock(side_effect=URLError("Connection refused")))
+    mock_chat_ollama = MagicMock(side_effect=lambda **kwargs: MagicMock())
+    monkeypatch.setattr("langchain_ollama.ChatOllama", mock_chat_ollama)
+    mock_agent_instance = MagicMock()
+    mock_agent_instance.ainvoke = AsyncMock(return_value={"messages": [AIMessage("Hi")]})
+    mock_create_agent.return_value = mock_agent_instance
+
+    first = ChatAgent(provider="ollama", settings=mock_settings)
+    first.invoke("Hello")
+    first.close()
+    second = ChatAgent(provider="ollama", settings=mock_settings)
+    assert second.invoke("Hello") == "Hi"
+    second.close()
+
+    first_llm, second_llm = (c.kwargs["model"] for c in mock_create_agent.call_args_list)
+    assert first_llm is not second_llm
+    assert OllamaProvider(mock_settings.get_provider_config("ollama")).get_llm() not in (first_llm, second_llm)
+    assert mock_chat_ollama.call_count == 3
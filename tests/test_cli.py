@@ -1,234 +1,147 @@
 """Unit tests for CLI commands."""
 
-from unittest.mock import MagicMock, patch
-
-from click.testing import CliRunner
+import pytest
 
 from chat_bot.cli.main import cli
 
 
-@patch("chat_bot.cli.main.ChatAgent")
-@patch("chat_bot.cli.main.Settings")
-@patch("chat_bot.cli.main.click.prompt")
-@patch("chat_bot.cli.main.click.echo")
-def test_cli_chat_command(mock_echo, mock_prompt, mock_settings, mock_chat_agent):
+def test_cli_chat_command(cli_mocks, cli_runner):
     """Test that chat command initializes agent and starts interactive loop (mocked).
     
     Verifies that the chat command correctly initializes a ChatAgent
     and handles user input in an interactive loop, displaying responses.
     """
-    # Setup mocks
-    mock_settings_instance = MagicMock()
-    mock_settings.return_value = mock_settings_instance
-    
-    mock_agent_instance = MagicMock()
-    mock_agent_instance.get_model_name.return_value = "llama3.2:3b"
-    mock_agent_instance.invoke.return_value = "Test response"
-    mock_chat_agent.return_value = mock_agent_instance
+    cli_mocks.agent.stream.return_value = iter(["Test ", "response"])
     
     # Simulate user input: first message, then exit
-    mock_prompt.side_effect = ["Hello", "exit"]
-    
-    # Call chat command using CliRunner
-    runner = CliRunner()
-    _ = runner.invoke(cli, ["chat", "--provider", "ollama"])
+    result = cli_runner.invoke(cli, ["chat", "--provider", "ollama"], input="Hello\nexit\n")
     
     # Verify agent was created
-    mock_chat_agent.assert_called_once_with(
+    cli_mocks.chat_agent.assert_called_once_with(
         provider="ollama",
         model=None,
-        settings=mock_settings_instance
+        settings=cli_mocks.settings
     )
     
-    # Verify echo was called for initial messages
-    assert mock_echo.call_count >= 2
+    # Verify the streamed chunks were printed as one response
+    cli_mocks.agent.stream.assert_called_once_with("Hello")
+    assert "Bot [llama3.2:3b]: Test response\n" in result.output
 
 
-@patch("chat_bot.cli.main.ChatAgent")
-@patch("chat_bot.cli.main.Settings")
-@patch("chat_bot.cli.main.click.prompt")
-@patch("chat_bot.cli.main.click.echo")
-def test_cli_chat_command_exit(mock_echo, mock_prompt, mock_settings, mock_chat_agent):
-    """Test that chat command handles exit/quit commands.
-    
-    Verifies that the chat command correctly exits when the user
-    types 'exit' or 'quit'.
+def test_cli_chat_command_eof(cli_mocks, cli_runner):
+    """Test that chat command ends the session at end of input.
+
+    Verifies that blank lines are skipped and that the session exits
+    cleanly when stdin is exhausted without an exit command.
     """
-    # Setup mocks
-    mock_settings_instance = MagicMock()
-    mock_settings.return_value = mock_settings_instance
-    
-    mock_agent_instance = MagicMock()
-    mock_agent_instance.get_model_name.return_value = "llama3.2:3b"
-    mock_chat_agent.return_value = mock_agent_instance
-    
-    # Simulate user typing 'quit' immediately
-    mock_prompt.return_value = "quit"
-    
-    # Call chat command using CliRunner
-    runner = CliRunner()
-    _ = runner.invoke(cli, ["chat", "--provider", "ollama"])
-    
-    # Verify agent was created but invoke was not called
-    mock_chat_agent.assert_called_once()
-    mock_agent_instance.invoke.assert_not_called()
+    cli_mocks.agent.stream.return_value = iter(["Hi"])
+
+    # Simulate a blank line and a message, then end of input
+    result = cli_runner.invoke(cli, ["chat", "--provider", "ollama"], input="\nHello\n")
 
+    # Verify only the message was sent and the session ended
+    assert result.exit_code == 0
+    cli_mocks.agent.stream.assert_called_once_with("Hello")
+    assert "You: " in result.output
+    assert "Exiting..." in result.output
 
-@patch("chat_bot.cli.main.ChatAgent")
-@patch("chat_bot.cli.main.Settings")
-@patch("chat_bot.cli.main.click.prompt")
-@patch("chat_bot.cli.main.click.echo")
-def test_cli_chat_command_error(mock_echo, mock_prompt, mock_settings, mock_chat_agent):
+
+def test_cli_chat_command_error(cli_mocks, cli_runner):
     """Test that chat command handles errors gracefully.
     
     Verifies that the chat command continues running even when
     an error occurs during agent invocation, displaying the error
     message to the user.
     """
-    # Setup mocks
-    mock_settings_instance = MagicMock()
-    mock_settings.return_value = mock_settings_instance
-    
-    mock_agent_instance = MagicMock()
-    mock_agent_instance.get_model_name.return_value = "llama3.2:3b"
-    mock_agent_instance.invoke.side_effect = Exception("Test error")
-    mock_chat_agent.return_value = mock_agent_instance
+    cli_mocks.agent.stream.side_effect = Exception("Test error")
     
     # Simulate user input: message that causes error, then exit
-    mock_prompt.side_effect = ["Test message", "exit"]
-    
-    # Call chat command using CliRunner
-    runner = CliRunner()
-    _ = runner.invoke(cli, ["chat", "--provider", "ollama"])
+    result = cli_runner.invoke(cli, ["chat", "--provider", "ollama"], input="Test message\nexit\n")
     
-    # Verify error was displayed
-    error_calls = [call for call in mock_echo.call_args_list if "Error" in str(call)]
-    assert len(error_calls) > 0
+    # Verify error was displayed and the session continued to the exit command
+    assert "Error: Test error" in result.stderr
+    assert result.exit_code == 0
 
 
-@patch("chat_bot.cli.main.ChatAgent")
-@patch("chat_bot.cli.main.Settings")
-@patch("chat_bot.cli.main.click.echo")
-def test_cli_run_command(mock_echo, mock_settings, mock_chat_agent):
+def test_cli_run_command(cli_mocks, cli_runner):
     """Test that run command processes message and outputs response.
     
     Verifies that the run command correctly processes a single message
     and outputs the agent's response.
     """
-    # Setup mocks
-    mock_settings_instance = MagicMock()
-    mock_settings.return_value = mock_settings_instance
-    
-    mock_agent_instance = MagicMock()
-    mock_agent_instance.invoke.return_value = "Test response"
-    mock_chat_agent.return_value = mock_agent_instance
-    
-    # Call run command using CliRunner
-    runner = CliRunner()
-    _ = runner.invoke(cli, ["run", "Test message", "--provider", "ollama"])
+    result = cli_runner.invoke(cli, ["run", "Test message", "--provider", "ollama"])
     
     # Verify agent was created and invoked
-    mock_chat_agent.assert_called_once_with(
+    cli_mocks.chat_agent.assert_called_once_with(
         provider="ollama",
         model=None,
-        settings=mock_settings_instance
+        settings=cli_mocks.settings
     )
-    mock_agent_instance.invoke.assert_called_once_with("Test message")
-    mock_echo.assert_called_once_with("Test response")
+    cli_mocks.agent.invoke.assert_called_once_with("Test message")
+    assert result.stdout == "Test response\n"
 
 
-@patch("chat_bot.cli.main.ChatAgent")
-@patch("chat_bot.cli.main.Settings")
-@patch("chat_bot.cli.main.click.echo")
-@patch("chat_bot.cli.main.sys.exit")
-def test_cli_run_command_error(mock_exit, mock_echo, mock_settings, mock_chat_agent):
+def test_cli_run_command_error(cli_mocks, cli_runner):
     """Test that run command handles errors and exits with code 1.
     
     Verifies that the run command correctly handles errors during
     agent invocation, displays the error message, and exits with
     code 1.
     """
-    # Setup mocks
-    mock_settings_instance = MagicMock()
-    mock_settings.return_value = mock_settings_instance
-    
-    mock_agent_instance = MagicMock()
-    mock_agent_instance.invoke.side_effect = Exception("Test error")
-    mock_chat_agent.return_value = mock_agent_instance
-    
-    # Call run command using CliRunner
-    runner = CliRunner()
-    _ = runner.invoke(cli, ["run", "Test message", "--provider", "ollama"])
-    
-    # Verify error was displayed and exit was called with code 1
-    error_calls = [call for call in mock_echo.call_args_list if "Error" in str(call)]
-    assert len(error_calls) > 0
-    # Check that sys.exit(1) was called (may be called multiple times by CliRunner)
-    mock_exit.assert_any_call(1)
-
-
-@patch("chat_bot.cli.main.ChatAgent")
-@patch("chat_bot.cli.main.Settings")
-@patch("chat_bot.cli.main.click.prompt")
-@patch("chat_bot.cli.main.click.echo")
-def test_cli_provider_option(mock_echo, mock_prompt, mock_settings, mock_chat_agent):
-    """Test that provider option is passed to agent.
-    
-    Verifies that the provider option from the CLI is correctly
-    passed to the ChatAgent constructor.
+    cli_mocks.agent.invoke.side_effect = Exception("Test error")
+    
+    result = cli_runner.invoke(cli, ["run", "Test message", "--provider", "ollama"])
+    
+    # Verify error was displayed and the command exited with code 1
+    assert "Error: Test error" in result.stderr
+    assert result.exit_code == 1
+
+
+@pytest.mark.parametrize(
+    ("args", "expected_kwargs", "user_input"),
+    [
+        (["--provider", "ollama"], {"provider": "ollama", "model": None}, "quit\n"),
+        (["--provider", "gemini"], {"provider": "gemini", "model": None}, "exit\n"),
+        (
+            ["--provider", "ollama", "--model", "llama3.2:1b"],
+            {"provider": "ollama", "model": "llama3.2:1b"},
+            "exit\n",
+        ),
+    ],
+    ids=["quit", "provider_option", "model_option"],
+)
+def test_cli_chat_options(args, expected_kwargs, user_input, cli_mocks, cli_runner):
+    """Test that chat options reach the agent and exit commands end the session.
+    
+    Verifies that the provider and model options from the CLI are passed
+    to the ChatAgent constructor, and that typing 'exit' or 'quit' ends
+    the session without sending a message.
     """
-    # Setup mocks
-    mock_settings_instance = MagicMock()
-    mock_settings.return_value = mock_settings_instance
-    
-    mock_agent_instance = MagicMock()
-    mock_agent_instance.get_model_name.return_value = "gemini-2.5-flash"
-    mock_chat_agent.return_value = mock_agent_instance
+    # Start a chat session and exit immediately
+    cli_runner.invoke(cli, ["chat", *args], input=user_input)
     
-    # Simulate user typing exit immediately
-    mock_prompt.return_value = "exit"
-    
-    # Call chat command with gemini provider using CliRunner
-    runner = CliRunner()
-    _ = runner.invoke(cli, ["chat", "--provider", "gemini"])
-    
-    # Verify agent was created with correct provider
-    mock_chat_agent.assert_called_once_with(
-        provider="gemini",
-        model=None,
-        settings=mock_settings_instance
-    )
+    # Verify agent was created with the options but no message was sent
+    cli_mocks.chat_agent.assert_called_once_with(settings=cli_mocks.settings, **expected_kwargs)
+    cli_mocks.agent.stream.assert_not_called()
 
 
-@patch("chat_bot.cli.main.ChatAgent")
-@patch("chat_bot.cli.main.Settings")
-@patch("chat_bot.cli.main.click.prompt")
-@patch("chat_bot.cli.main.click.echo")
-def test_cli_model_option(mock_echo, mock_prompt, mock_settings, mock_chat_agent):
-    """Test that model option is passed to agent.
+def test_cli_chat_no_interactive(cli_mocks, cli_runner):
+    """Test that non-interactive chat answers stdin lines in batches.
     
-    Verifies that the model option from the CLI is correctly
-    passed to the ChatAgent constructor.
+    Verifies that blank lines are skipped, messages are sent as one batch
+    with the configured concurrency, and responses are printed in order.
     """
-    # Setup mocks
-    mock_settings_instance = MagicMock()
-    mock_settings.return_value = mock_settings_instance
-    
-    mock_agent_instance = MagicMock()
-    mock_agent_instance.get_model_name.return_value = "llama3.2:1b"
-    mock_chat_agent.return_value = mock_agent_instance
-    
-    # Simulate user typing exit immediately
-    mock_prompt.return_value = "exit"
+    cli_mocks.settings.max_concurrency = 4
+    cli_mocks.agent.batch.return_value = ["Answer 1", Exception("Test error")]
     
-    # Call chat command with model option using CliRunner
-    runner = CliRunner()
-    _ = runner.invoke(cli, ["chat", "--provider", "ollama", "--model", "llama3.2:1b"])
+    # Pipe messages through stdin
+    result = cli_runner.invoke(
+        cli, ["chat", "--no-interactive"], input="Question 1\n\nQuestion 2\n"
+    )
     
-    # Verify agent was created with correct model
-    mock_chat_agent.assert_called_once_with(
-        provider="ollama",
-        model="llama3.2:1b",
-        settings=mock_settings_instance
+    # Verify messages were batched and answers printed in order
+    cli_mocks.agent.batch.assert_called_once_with(
+        ["Question 1", "Question 2"], max_concurrency=4
     )
-
+    assert result.stdout == "Answer 1\n"
+    assert "Error: Test error" in result.stderr
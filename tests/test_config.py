@@ -1,206 +1,236 @@
 """Unit tests for Settings class."""
 
+from dataclasses import FrozenInstanceError, replace
 from unittest.mock import patch
 
 import pytest
 
-from chat_bot.config.settings import Settings
+from chat_bot.config.settings import GeminiConfig, OllamaConfig, Settings, _load_env, get_settings
+
+# Environment variables read by Settings.from_env()
+SETTINGS_ENV_VARS = (
+    "OLLAMA_BASE_URL",
+    "OLLAMA_MODEL",
+    "GEMINI_API_KEY",
+    "GEMINI_MODEL",
+    "GEMINI_REQUESTS_PER_MINUTE",
+    "MODEL_MEMORY_LIMIT",
+    "MEMORY_LOW_WATER",
+    "CONTEXT_WINDOW_TOKENS",
+    "RESPONSE_CACHE_SIZE",
+    "MAX_CONCURRENCY",
+    "ENABLE_LLM_CACHE",
+    "PROMPT_CACHE_SIZE",
+    "MCP_URL",
+    "MCP_TIMEOUT",
+)
+
+
+@pytest.fixture
+def clean_env(monkeypatch):
+    """Fixture clearing settings environment variables and skipping .env loading.
+    
+    Returns the monkeypatch fixture so tests can set the variables they need.
+    """
+    monkeypatch.setattr("chat_bot.config.settings.load_dotenv", lambda *args, **kwargs: None)
+    for name in SETTINGS_ENV_VARS:
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
 
 
-def test_settings_initialization_defaults():
+def test_settings_initialization_defaults(clean_env):
     """Test that Settings loads with default values.
     
     Verifies that Settings can be instantiated and loads default
     values when environment variables are not set.
     """
-    def getenv_side_effect(key, default=None):
-        # Return None for all keys to simulate env vars not being set
-        # This allows the default parameter to be used
-        return default
-    
-    with patch("chat_bot.config.settings.load_dotenv"):
-        with patch("chat_bot.config.settings.os.getenv", side_effect=getenv_side_effect):
-            settings = Settings()
-            
-            assert settings.ollama_base_url == "http://localhost:11434"
-            assert settings.ollama_model == "llama3.2"
-            assert settings.gemini_api_key is None
-            assert settings.gemini_model == "gemini-2.5-flash"
-
-
-@patch("chat_bot.config.settings.load_dotenv")
-@patch("chat_bot.config.settings.os.getenv")
-def test_settings_initialization_env_vars(mock_getenv, mock_load_dotenv):
+    settings = Settings.from_env()
+    
+    assert settings.ollama_base_url == "http://localhost:11434"
+    assert settings.ollama_model == "llama3.2"
+    assert settings.gemini_api_key is None
+    assert settings.gemini_model == "gemini-2.5-flash"
+    assert settings.context_window_tokens == 8192
+    assert settings.memory_low_water is None
+    assert settings.enable_llm_cache is False
+
+
+def test_settings_initialization_env_vars(clean_env):
     """Test that Settings loads from environment variables.
     
     Verifies that Settings correctly loads configuration values
     from environment variables when they are set.
     """
-    # Setup mock to return different values for different env vars
-    def getenv_side_effect(key, default=None):
-        env_vars = {
-            "OLLAMA_BASE_URL": "http://custom:11434",
-            "OLLAMA_MODEL": "custom-model",
-            "GEMINI_API_KEY": "custom-api-key",
-            "GEMINI_MODEL": "custom-gemini-model"
-        }
-        return env_vars.get(key, default)
+    clean_env.setenv("OLLAMA_BASE_URL", "http://custom:11434")
+    clean_env.setenv("OLLAMA_MODEL", "custom-model")
+    clean_env.setenv("GEMINI_API_KEY", "custom-api-key")
+    clean_env.setenv("GEMINI_MODEL", "custom-gemini-model")
+    clean_env.setenv("ENABLE_LLM_CACHE", "True")
     
-    mock_getenv.side_effect = getenv_side_effect
-    
-    settings = Settings()
+    settings = Settings.from_env()
     
     assert settings.ollama_base_url == "http://custom:11434"
     assert settings.ollama_model == "custom-model"
     assert settings.gemini_api_key == "custom-api-key"
     assert settings.gemini_model == "custom-gemini-model"
+    assert settings.enable_llm_cache is True
 
 
-def test_settings_get_provider_config_ollama():
+def test_settings_get_provider_config_ollama(mock_settings):
     """Test that Ollama config retrieval works.
     
     Verifies that get_provider_config() returns the correct
-    configuration dictionary for the Ollama provider.
+    configuration for the Ollama provider.
     """
-    settings = Settings()
-    settings.ollama_base_url = "http://localhost:11434"
-    settings.ollama_model = "llama3.2"
-    
-    config = settings.get_provider_config("ollama")
+    config = mock_settings.get_provider_config("ollama")
     
-    assert config == {
-        "base_url": "http://localhost:11434",
-        "model": "llama3.2"
-    }
+    assert config == OllamaConfig(
+        base_url="http://localhost:11434",
+        model="llama3.2",
+        prompt_cache_size=0,
+    )
+    assert config.get("base_url") == "http://localhost:11434"
 
 
-def test_settings_get_provider_config_gemini():
+def test_settings_get_provider_config_gemini(mock_settings):
     """Test that Gemini config retrieval works.
     
     Verifies that get_provider_config() returns the correct
-    configuration dictionary for the Gemini provider.
+    configuration for the Gemini provider.
     """
-    settings = Settings()
-    settings.gemini_api_key = "test-api-key"
-    settings.gemini_model = "gemini-2.5-flash"
+    config = mock_settings.get_provider_config("gemini")
     
-    config = settings.get_provider_config("gemini")
-    
-    assert config == {
-        "api_key": "test-api-key",
-        "model": "gemini-2.5-flash"
-    }
+    assert config == GeminiConfig(
+        api_key="test-api-key",
+        model="gemini-2.5-flash",
+        prompt_cache_size=0,
+    )
+    assert "test-api-key" not in repr(config)
 
 
-def test_settings_get_provider_config_gemini_missing_key():
+def test_settings_get_provider_config_gemini_missing_key(mock_settings):
     """Test that ValueError is raised when API key missing.
     
     Verifies that get_provider_config() raises ValueError with
     a helpful error message when the Gemini API key is not set.
     """
-    settings = Settings()
-    settings.gemini_api_key = None
-    settings.gemini_model = "gemini-2.5-flash"
+    settings = replace(mock_settings, gemini_api_key=None)
     
     with pytest.raises(ValueError, match="GEMINI_API_KEY"):
         settings.get_provider_config("gemini")
 
 
-def test_settings_get_provider_config_unknown():
+def test_provider_config_validation():
+    """Test that provider configs are validated when created.
+
+    Verifies that OllamaConfig and GeminiConfig raise ValueError for
+    missing models, malformed base URLs, and missing API keys.
+    """
+    with pytest.raises(ValueError, match="model name is required"):
+        OllamaConfig(model="")
+    with pytest.raises(ValueError, match="Invalid Ollama base URL"):
+        OllamaConfig(base_url="localhost:11434", model="llama3.2")
+    with pytest.raises(ValueError, match="API key is required"):
+        GeminiConfig(model="gemini-2.5-flash")
+    with pytest.raises(ValueError, match="model name is required"):
+        GeminiConfig(api_key="test-api-key", model="")
+
+
+def test_settings_get_provider_config_unknown(mock_settings):
     """Test that ValueError is raised for unknown provider.
     
     Verifies that get_provider_config() raises ValueError with
     a helpful error message when an unknown provider is requested.
     """
-    settings = Settings()
-    
     with pytest.raises(ValueError, match="Unknown provider"):
-        settings.get_provider_config("unknown")
+        mock_settings.get_provider_config("unknown")
 
 
-def test_settings_validate():
+def test_settings_validate(mock_settings):
     """Test that validate() returns True.
     
     Verifies that validate() returns True for valid settings.
     The current implementation always returns True, but this
     test ensures the method exists and works.
     """
-    settings = Settings()
-    
-    assert settings.validate() is True
+    assert mock_settings.validate() is True
 
 
-@patch("chat_bot.config.settings.load_dotenv")
-@patch("chat_bot.config.settings.os.getenv")
-def test_settings_mcp_url_set(mock_getenv, mock_load_dotenv):
+def test_settings_mcp_url_set(clean_env):
     """Test that Settings loads MCP_URL from environment variable.
     
     Verifies that Settings correctly loads MCP_URL when the environment
     variable is set.
     """
-    def getenv_side_effect(key, default=None):
-        if key == "MCP_URL":
-            return "http://localhost:8000/mcp"
-        return default
-    
-    mock_getenv.side_effect = getenv_side_effect
+    clean_env.setenv("MCP_URL", "http://localhost:8000/mcp")
     
-    settings = Settings()
+    settings = Settings.from_env()
     
     assert settings.mcp_url == "http://localhost:8000/mcp"
 
 
-@patch("chat_bot.config.settings.load_dotenv")
-@patch("chat_bot.config.settings.os.getenv")
-def test_settings_mcp_url_not_set(mock_getenv, mock_load_dotenv):
+def test_settings_mcp_url_not_set(clean_env):
     """Test that Settings.mcp_url is None when MCP_URL is not set.
     
     Verifies that Settings.mcp_url is None when the MCP_URL environment
     variable is not set.
     """
-    def getenv_side_effect(key, default=None):
-        return default
-    
-    mock_getenv.side_effect = getenv_side_effect
-    
-    settings = Settings()
+    settings = Settings.from_env()
     
     assert settings.mcp_url is None
 
 
-@patch("chat_bot.config.settings.load_dotenv")
-@patch("chat_bot.config.settings.os.getenv")
-def test_settings_mcp_url_empty_string(mock_getenv, mock_load_dotenv):
+def test_settings_mcp_url_empty_string(clean_env):
     """Test that Settings normalizes empty MCP_URL string to None.
     
     Verifies that Settings normalizes empty strings to None for MCP_URL.
     """
-    def getenv_side_effect(key, default=None):
-        if key == "MCP_URL":
-            return ""
-        return default
-    
-    mock_getenv.side_effect = getenv_side_effect
+    clean_env.setenv("MCP_URL", "")
     
-    settings = Settings()
+    settings = Settings.from_env()
     
     assert settings.mcp_url is None
 
 
-@patch("chat_bot.config.settings.load_dotenv")
-@patch("chat_bot.config.settings.os.getenv")
-def test_settings_mcp_url_whitespace_only(mock_getenv, mock_load_dotenv):
+def test_settings_mcp_url_whitespace_only(clean_env):
     """Test that Settings normalizes whitespace-only MCP_URL to None.
     
     Verifies that Settings normalizes whitespace-only strings to None for MCP_URL.
     """
-    def getenv_side_effect(key, default=None):
-        if key == "MCP_URL":
-            return "   "
-        return default
+    clean_env.setenv("MCP_URL", "   ")
     
-    mock_getenv.side_effect = getenv_side_effect
-    
-    settings = Settings()
+    settings = Settings.from_env()
     
     assert settings.mcp_url is None
+
+
+def test_get_settings_cached():
+    """Test that get_settings() returns a single shared instance.
+    
+    Verifies that repeated calls reuse the same Settings instance and
+    only load the .env file once.
+    """
+    get_settings.cache_clear()
+    _load_env.cache_clear()
+    
+    with patch("chat_bot.config.settings.load_dotenv") as mock_load_dotenv:
+        first = get_settings()
+        second = get_settings()
+        Settings.from_env()
+    
+    assert first is second
+    mock_load_dotenv.assert_called_once()
+    get_settings.cache_clear()
+
+
+def test_settings_immutable(mock_settings):
+    """Test that Settings instances cannot be modified.
+    
+    Verifies that Settings is frozen so a shared instance can be reused
+    safely, and that modified copies can be derived with replace().
+    """
+    with pytest.raises(FrozenInstanceError):
+        mock_settings.ollama_model = "other-model"
+    
+    assert replace(mock_settings, ollama_model="other-model").ollama_model == "other-model"
+    assert mock_settings.ollama_model == "llama3.2"
@@ -1,11 +1,21 @@
 """Unit tests for BaseProvider abstract class."""
 
+import asyncio
+import io
+import json
+from unittest.mock import patch
+
 import pytest
+from langchain_core.caches import InMemoryCache
+from langchain_core.globals import get_llm_cache
 
+from chat_bot.providers._cache import disable_llm_cache, enable_llm_cache
+from chat_bot.providers._limits import TokenBucket
 from chat_bot.providers.base import BaseProvider
-from chat_bot.providers.gemini import GeminiProvider
 from chat_bot.providers.ollama import OllamaProvider
 
+_OLLAMA_CFG = {"base_url": "http://localhost:11434", "model": "llama3.2"}
+
 
 def test_base_provider_initialization():
     """Test that BaseProvider cannot be instantiated (abstract).
@@ -17,7 +27,7 @@ def test_base_provider_initialization():
         BaseProvider(config={})
 
 
-def test_base_provider_interface():
+def test_base_provider_interface(gemini_provider):
     """Test that concrete providers implement required methods.
     
     Verifies that concrete provider implementations (OllamaProvider
@@ -25,8 +35,7 @@ def test_base_provider_interface():
     BaseProvider.
     """
     # Test OllamaProvider implements required methods
-    ollama_config = {"base_url": "http://localhost:11434", "model": "llama3.2"}
-    ollama_provider = OllamaProvider(ollama_config)
+    ollama_provider = OllamaProvider(dict(_OLLAMA_CFG))
     
     assert hasattr(ollama_provider, "get_llm")
     assert hasattr(ollama_provider, "invoke")
@@ -34,33 +43,32 @@ def test_base_provider_interface():
     assert callable(ollama_provider.invoke)
     
     # Test GeminiProvider implements required methods
-    gemini_config = {"api_key": "test-key", "model": "gemini-2.5-flash"}
-    gemini_provider = GeminiProvider(gemini_config)
-    
     assert hasattr(gemini_provider, "get_llm")
     assert hasattr(gemini_provider, "invoke")
     assert callable(gemini_provider.get_llm)
     assert callable(gemini_provider.invoke)
 
 
-def test_base_provider_get_model_name():
+def test_base_provider_get_model_name(gemini_provider, monkeypatch):
     """Test that get_model_name() default implementation works.
     
     Verifies that the default implementation of get_model_name() in
     BaseProvider returns the model name from the config or "unknown"
     if no model is set.
     """
+    # Serve a fixed Ollama model listing instead of querying a live server
+    listing = json.dumps({"models": [{"name": "llama3.2:3b"}]}).encode()
+    monkeypatch.setattr(
+        "chat_bot.providers.ollama.urlopen", lambda request, timeout: io.BytesIO(listing)
+    )
+
     # Test with OllamaProvider (uses default implementation)
-    ollama_config = {"base_url": "http://localhost:11434", "model": "llama3.2"}
-    ollama_provider = OllamaProvider(ollama_config)
+    ollama_provider = OllamaProvider(dict(_OLLAMA_CFG))
     
     # Model name should be available
     assert ollama_provider.get_model_name() == "llama3.2:3b"
     
     # Test with GeminiProvider
-    gemini_config = {"api_key": "test-key", "model": "gemini-2.5-flash"}
-    gemini_provider = GeminiProvider(gemini_config)
-    
     assert gemini_provider.get_model_name() == "gemini-2.5-flash"
 
 
@@ -72,8 +80,7 @@ def test_base_provider_validate_config():
     to add validation logic.
     """
     # Test with OllamaProvider (uses default implementation initially)
-    ollama_config = {"base_url": "http://localhost:11434", "model": "llama3.2"}
-    ollama_provider = OllamaProvider(ollama_config)
+    ollama_provider = OllamaProvider(dict(_OLLAMA_CFG))
     
     # Default implementation returns True
     # Note: OllamaProvider overrides this, so we test the base behavior
@@ -81,3 +88,48 @@ def test_base_provider_validate_config():
     assert hasattr(ollama_provider, "validate_config")
     assert callable(ollama_provider.validate_config)
 
+
+def test_llm_response_cache():
+    """Test that the global LLM response cache can be enabled and removed.
+
+    Verifies that enable_llm_cache() installs an in-memory cache once and
+    keeps it on repeat calls, and that disable_llm_cache() removes it.
+    """
+    try:
+        enable_llm_cache()
+        cache = get_llm_cache()
+        assert isinstance(cache, InMemoryCache)
+
+        enable_llm_cache()
+        assert get_llm_cache() is cache
+    finally:
+        disable_llm_cache()
+
+    assert get_llm_cache() is None
+
+
+@patch("chat_bot.providers._limits.time.sleep")
+def test_token_bucket(mock_sleep):
+    """Test that TokenBucket spaces requests beyond the burst size.
+
+    Verifies that the first requests up to the burst size proceed without
+    waiting, later requests wait for their refill interval, and
+    non-blocking acquires fail while the bucket is empty.
+    """
+    bucket = TokenBucket(requests_per_minute=60, burst=2)
+
+    assert bucket.acquire()
+    assert bucket.acquire()
+    mock_sleep.assert_not_called()
+    assert bucket.acquire(blocking=False) is False
+
+    assert bucket.acquire()
+    assert mock_sleep.call_args.args[0] == pytest.approx(1.0, abs=0.05)
+    assert asyncio.run(bucket.aacquire(blocking=False)) is False
+
+    # The default burst holds ten seconds' worth of requests
+    assert TokenBucket(requests_per_minute=60).burst == 10
+    assert TokenBucket(requests_per_minute=3).burst == 1
+
+    with pytest.raises(ValueError):
+        TokenBucket(requests_per_minute=0)
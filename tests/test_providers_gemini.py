@@ -6,12 +6,41 @@ Mocking Strategy:
 - All API calls are intercepted and return mock responses without making actual HTTP requests
 """
 
-from unittest.mock import MagicMock, patch
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from chat_bot.providers._limits import TokenBucket
 from chat_bot.providers.gemini import GeminiProvider
 
+_GEMINI_CFG = {"api_key": "test-api-key", "model": "gemini-2.5-flash"}
+
+
+class _StrOnlyMessage:
+    """Response object without a content attribute."""
+
+    def __str__(self):
+        return "String representation"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _chat_google_genai_patch():
+    """Patch the ChatGoogleGenerativeAI class once for the whole module."""
+    with patch("langchain_google_genai.ChatGoogleGenerativeAI") as mock_cls:
+        yield mock_cls
+
+
+@pytest.fixture(autouse=True)
+def mock_chat_google_genai(_chat_google_genai_patch):
+    """Fixture providing the patched ChatGoogleGenerativeAI class, reset per test."""
+    _chat_google_genai_patch.reset_mock(return_value=True, side_effect=True)
+    return _chat_google_genai_patch
+
 
 def test_gemini_provider_initialization():
     """Test that GeminiProvider initializes with config.
@@ -19,7 +48,7 @@ def test_gemini_provider_initialization():
     Verifies that GeminiProvider can be instantiated with a valid
     configuration dictionary containing api_key and model.
     """
-    config = {"api_key": "test-api-key", "model": "gemini-2.5-flash"}
+    config = dict(_GEMINI_CFG)
     provider = GeminiProvider(config)
     
     assert provider.api_key == "test-api-key"
@@ -27,8 +56,7 @@ def test_gemini_provider_initialization():
     assert provider.config == config
 
 
-@patch("chat_bot.providers.gemini.ChatGoogleGenerativeAI")
-def test_gemini_get_llm(mock_chat_google_genai):
+def test_gemini_get_llm(mock_chat_google_genai, gemini_provider):
     """Test that get_llm() returns ChatGoogleGenerativeAI instance (mocked).
     
     Verifies that get_llm() creates and returns a ChatGoogleGenerativeAI
@@ -38,16 +66,82 @@ def test_gemini_get_llm(mock_chat_google_genai):
     mock_llm_instance = MagicMock()
     mock_chat_google_genai.return_value = mock_llm_instance
     
-    config = {"api_key": "test-api-key", "model": "gemini-2.5-flash"}
-    provider = GeminiProvider(config)
-    
-    llm = provider.get_llm()
+    llm = gemini_provider.get_llm()
     
+    # The LLM instance is built once and cached
     assert llm == mock_llm_instance
-    mock_chat_google_genai.assert_called_once_with(
-        model="gemini-2.5-flash",
-        google_api_key="test-api-key"
-    )
+    assert gemini_provider.get_llm() is llm
+    mock_chat_google_genai.assert_called_once()
+    kwargs = mock_chat_google_genai.call_args.kwargs
+    assert kwargs["model"] == "gemini-2.5-flash"
+    assert kwargs["google_api_key"] == "test-api-key"
+
+
+def test_gemini_get_llm_rate_limit(mock_chat_google_genai):
+    """Test that get_llm() applies the configured request rate limit.
+
+    Verifies that the LLM is built with a token bucket limited to 60
+    requests per minute by default, that a burst of requests goes out
+    without waiting, and that no limiter is used when requests_per_minute
+    is 0.
+    """
+    mock_chat_google_genai.side_effect = lambda **kwargs: MagicMock()
+    config = dict(_GEMINI_CFG)
+
+    GeminiProvider(config).get_llm()
+    rate_limiter = mock_chat_google_genai.call_args.kwargs["rate_limiter"]
+    assert isinstance(rate_limiter, TokenBucket)
+    assert rate_limiter.rate == 1.0
+
+    # The model calls of an agent turn or a small batch are not serialized
+    with patch("chat_bot.providers._limits.time.sleep") as mock_sleep:
+        assert all(rate_limiter.acquire() for _ in range(10))
+    mock_sleep.assert_not_called()
+
+    GeminiProvider({**config, "requests_per_minute": 0}).get_llm()
+    assert mock_chat_google_genai.call_args.kwargs["rate_limiter"] is None
+
+
+def test_gemini_get_llm_shared(mock_chat_google_genai):
+    """Test that providers with the same configuration share one LLM.
+
+    Verifies that a second GeminiProvider with the same model and API key
+    reuses the cached LLM instance, while a different API key or an
+    unshared request builds a new one.
+    """
+    mock_chat_google_genai.side_effect = lambda **kwargs: MagicMock()
+
+    config = dict(_GEMINI_CFG)
+    llm = GeminiProvider(config).get_llm()
+
+    assert GeminiProvider(dict(config)).get_llm() is llm
+    assert GeminiProvider({**config, "api_key": "other-key"}).get_llm() is not llm
+    assert GeminiProvider(dict(config)).get_llm(shared=False) is not llm
+    assert mock_chat_google_genai.call_count == 3
+
+
+def test_gemini_get_llm_thread_safe(mock_chat_google_genai, gemini_provider):
+    """Test that concurrent first calls to get_llm() build one LLM.
+
+    Verifies that threads racing on an unbuilt provider all receive the
+    same LLM instance and the SDK client is constructed only once.
+    """
+    def slow_build(**kwargs):
+        time.sleep(0.05)
+        return MagicMock()
+
+    mock_chat_google_genai.side_effect = slow_build
+    barrier = threading.Barrier(4)
+
+    def get_llm():
+        barrier.wait()
+        return gemini_provider.get_llm()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        llms = list(executor.map(lambda _: get_llm(), range(4)))
+
+    assert all(llm is llms[0] for llm in llms)
+    mock_chat_google_genai.assert_called_once()
 
 
 def test_gemini_get_llm_missing_api_key():
@@ -64,8 +158,7 @@ def test_gemini_get_llm_missing_api_key():
         provider.get_llm()
 
 
-@patch("chat_bot.providers.gemini.ChatGoogleGenerativeAI")
-def test_gemini_invoke(mock_chat_google_genai):
+def test_gemini_invoke(mock_chat_google_genai, gemini_provider):
     """Test that invoke() returns LLM response content.
     
     Verifies that invoke() correctly calls the LLM and extracts
@@ -73,22 +166,17 @@ def test_gemini_invoke(mock_chat_google_genai):
     """
     # Setup mock LLM
     mock_llm_instance = MagicMock()
-    mock_message = MagicMock()
-    mock_message.content = "Test response content"
+    mock_message = SimpleNamespace(content="Test response content")
     mock_llm_instance.invoke.return_value = mock_message
     mock_chat_google_genai.return_value = mock_llm_instance
     
-    config = {"api_key": "test-api-key", "model": "gemini-2.5-flash"}
-    provider = GeminiProvider(config)
-    
-    response = provider.invoke("Test prompt")
+    response = gemini_provider.invoke("Test prompt")
     
     assert response == "Test response content"
     mock_llm_instance.invoke.assert_called_once_with("Test prompt")
 
 
-@patch("chat_bot.providers.gemini.ChatGoogleGenerativeAI")
-def test_gemini_invoke_message_object(mock_chat_google_genai):
+def test_gemini_invoke_message_object(mock_chat_google_genai, gemini_provider):
     """Test that invoke() handles message objects correctly.
     
     Verifies that invoke() correctly handles different message object
@@ -98,65 +186,154 @@ def test_gemini_invoke_message_object(mock_chat_google_genai):
     mock_llm_instance = MagicMock()
     
     # Test with message object that has content attribute
-    mock_message = MagicMock()
-    mock_message.content = "Message with content"
+    mock_message = SimpleNamespace(content="Message with content")
     mock_llm_instance.invoke.return_value = mock_message
     mock_chat_google_genai.return_value = mock_llm_instance
     
-    config = {"api_key": "test-api-key", "model": "gemini-2.5-flash"}
-    provider = GeminiProvider(config)
-    
-    response = provider.invoke("Test prompt")
+    response = gemini_provider.invoke("Test prompt")
     
     assert response == "Message with content"
     
     # Test with message object without content (falls back to str())
-    mock_message_no_content = MagicMock()
-    del mock_message_no_content.content  # Remove content attribute
-    mock_message_no_content.__str__ = MagicMock(return_value="String representation")
+    mock_message_no_content = _StrOnlyMessage()
     mock_llm_instance.invoke.return_value = mock_message_no_content
     
-    response2 = provider.invoke("Test prompt 2")
+    response2 = gemini_provider.invoke("Test prompt 2")
     
     assert response2 == "String representation"
 
+    # Test with content given as a list of parts
+    mock_message_parts = SimpleNamespace(content=[{"type": "text", "text": "Part 1, "}, {"type": "text", "text": "part 2"}])
+    mock_llm_instance.invoke.return_value = mock_message_parts
+
+    assert gemini_provider.invoke("Test prompt 3") == "Part 1, part 2"
+
+
+def test_gemini_invoke_system_prompt(mock_chat_google_genai, gemini_provider):
+    """Test that invoke() sends a system prompt as a separate message.
+
+    Verifies that when system_prompt is given, the LLM receives a system
+    message followed by a human message instead of a single string.
+    """
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    # Setup mock LLM
+    mock_llm_instance = MagicMock()
+    mock_message = SimpleNamespace(content="Bonjour")
+    mock_llm_instance.invoke.return_value = mock_message
+    mock_chat_google_genai.return_value = mock_llm_instance
+
+    response = gemini_provider.invoke("Hello", system_prompt="Answer in French")
+
+    assert response == "Bonjour"
+    mock_llm_instance.invoke.assert_called_once_with(
+        [SystemMessage(content="Answer in French"), HumanMessage(content="Hello")]
+    )
+
+
+def test_gemini_stream(mock_chat_google_genai, gemini_provider):
+    """Test that stream() yields response text as chunks arrive.
+
+    Verifies that stream() extracts text from each streamed message chunk
+    and skips chunks without text.
+    """
+    # Setup mock LLM streaming three chunks, one of them empty
+    mock_llm_instance = MagicMock()
+    chunks = [MagicMock(content="Hello"), MagicMock(content=""), MagicMock(content=" world")]
+    mock_llm_instance.stream.return_value = iter(chunks)
+    mock_chat_google_genai.return_value = mock_llm_instance
+
+    assert list(gemini_provider.stream("Test prompt")) == ["Hello", " world"]
+    mock_llm_instance.stream.assert_called_once_with("Test prompt")
+
+
+def test_gemini_batch_invoke(mock_chat_google_genai, gemini_provider):
+    """Test that batch_invoke() sends all prompts in one batch call.
+
+    Verifies that batch_invoke() passes the prompts and concurrency limit
+    to the LLM's batch() method and extracts text from string and
+    list-of-parts message content.
+    """
+    # Setup mock LLM
+    mock_llm_instance = MagicMock()
+    first = SimpleNamespace(content="First")
+    second = SimpleNamespace(content=[{"type": "text", "text": "Second"}])
+    mock_llm_instance.batch.return_value = [first, second]
+    mock_chat_google_genai.return_value = mock_llm_instance
+
+    responses = gemini_provider.batch_invoke(["Prompt 1", "Prompt 2"], max_concurrency=2)
+
+    assert responses == ["First", "Second"]
+    mock_llm_instance.batch.assert_called_once_with(
+        ["Prompt 1", "Prompt 2"], config={"max_concurrency": 2}
+    )
+    mock_llm_instance.invoke.assert_not_called()
+
+
+def test_gemini_map_reduce(mock_chat_google_genai, gemini_provider):
+    """Test that map_reduce() batches the map step and reduces once.
 
-def test_gemini_get_model_name():
+    Verifies that the map prompts go through a single batch() call and
+    their answers are substituted into the reduce prompt.
+    """
+    # Setup mock LLM
+    mock_llm_instance = MagicMock()
+    mock_llm_instance.batch.return_value = [MagicMock(content="Summary A"), MagicMock(content="Summary B")]
+    mock_llm_instance.invoke.return_value = MagicMock(content="Combined")
+    mock_chat_google_genai.return_value = mock_llm_instance
+
+    result = gemini_provider.map_reduce(["Summarize A", "Summarize B"], "Combine:\n{partials}")
+
+    assert result == "Combined"
+    mock_llm_instance.batch.assert_called_once()
+    mock_llm_instance.invoke.assert_called_once_with("Combine:\nSummary A\n\nSummary B")
+
+
+def test_gemini_async_invoke(mock_chat_google_genai, gemini_provider):
+    """Test that ainvoke() and abatch() await the LLM's async methods.
+
+    Verifies that the async methods delegate to the LLM's ainvoke() and
+    abatch() and return the response text.
+    """
+    # Setup mock LLM
+    mock_llm_instance = MagicMock()
+    mock_message = SimpleNamespace(content="Async response")
+    mock_llm_instance.ainvoke = AsyncMock(return_value=mock_message)
+    mock_llm_instance.abatch = AsyncMock(return_value=[mock_message, mock_message])
+    mock_chat_google_genai.return_value = mock_llm_instance
+
+    assert asyncio.run(gemini_provider.ainvoke("Prompt")) == "Async response"
+    assert asyncio.run(gemini_provider.abatch(["A", "B"], max_concurrency=4)) == ["Async response"] * 2
+    mock_llm_instance.ainvoke.assert_awaited_once_with("Prompt")
+    mock_llm_instance.abatch.assert_awaited_once_with(["A", "B"], config={"max_concurrency": 4})
+
+
+def test_gemini_get_model_name(gemini_provider):
     """Test that get_model_name() returns model name.
     
     Verifies that get_model_name() returns the model name from
     the configuration.
     """
-    config = {"api_key": "test-api-key", "model": "gemini-2.5-flash"}
-    provider = GeminiProvider(config)
-    
-    model_name = provider.get_model_name()
+    model_name = gemini_provider.get_model_name()
     
     assert model_name == "gemini-2.5-flash"
 
 
-def test_gemini_validate_config():
+@pytest.mark.parametrize(
+    ("attribute", "expected_error"),
+    [(None, None), ("api_key", "API key is required"), ("model", "model name is required")],
+    ids=["valid", "missing_api_key", "missing_model"],
+)
+def test_gemini_validate_config(gemini_provider, attribute, expected_error):
     """Test that validate_config() checks required fields.
     
-    Verifies that validate_config() raises ValueError when required
-    fields (api_key or model) are missing.
+    Verifies that validate_config() returns True for a valid configuration
+    and raises ValueError when a required field (api_key or model) is missing.
     """
-    # Test with valid config
-    config = {"api_key": "test-api-key", "model": "gemini-2.5-flash"}
-    provider = GeminiProvider(config)
-    assert provider.validate_config() is True
+    if attribute is None:
+        assert gemini_provider.validate_config() is True
+        return
     
-    # Test with missing API key
-    config_no_key = {"model": "gemini-2.5-flash"}
-    provider_no_key = GeminiProvider(config_no_key)
-    provider_no_key.api_key = None
-    with pytest.raises(ValueError, match="API key is required"):
-        provider_no_key.validate_config()
-    
-    # Test with missing model
-    config_no_model = {"api_key": "test-api-key"}
-    provider_no_model = GeminiProvider(config_no_model)
-    provider_no_model.model = None
-    with pytest.raises(ValueError, match="model name is required"):
-        provider_no_model.validate_config()
-
+    setattr(gemini_provider, attribute, None)
+    with pytest.raises(ValueError, match=expected_error):
+        gemini_provider.validate_config()